@@ -4,6 +4,8 @@ Vietnamese VQA API Package
 This package contains:
 - main.py: FastAPI application with model loading
 - vqa_router.py: VQA prediction endpoints
+- serve.py: Preforking server sharing one loaded model across workers
+- load_balancer.py: Cache-affinity router in front of several API replicas
 """
 
 __version__ = "1.0.0" 
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Cache-affinity load balancer for VQA API replicas.
+
+Requests are routed by consistent hashing on the image content hash, so every question about
+the same image lands on the same replica and hits its image-embedding and response caches.
+Replicas are health-checked in the background; when the owner of an image is down, the
+request fails over to the next replica on the ring.
+
+Usage:
+    python -m api.load_balancer --replicas http://127.0.0.1:1236 http://127.0.0.1:1237 --port 1235
+"""
+import asyncio
+import base64
+import bisect
+import hashlib
+import logging
+import argparse
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import requests
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from api.utils.image_io import compute_image_hash
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 5.0
+REQUEST_TIMEOUT = 60
+# Replica responses meaning it could not serve the request at all; any other status
+# (including a 500 for an undecodable image) is the answer and is returned as is
+FAILOVER_STATUS = (502, 503, 504)
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+    """
+    def __init__(self, nodes: List[str], vnodes: int = 128):
+        """
+        Initializes the ring.
+
+        Args:
+            nodes (List[str]): Replica base URLs.
+            vnodes (int): Virtual nodes per replica, for an even key spread.
+        """
+        self.nodes = list(nodes)
+        self._ring = sorted(
+            (_ring_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._keys = [point for point, _ in self._ring]
+
+    def preference_list(self, key: str) -> List[str]:
+        """Returns all replicas in ring order starting from the owner of key."""
+        start = bisect.bisect(self._keys, _ring_hash(key)) % len(self._ring)
+        ordered = []
+        for i in range(len(self._ring)):
+            node = self._ring[(start + i) % len(self._ring)][1]
+            if node not in ordered:
+                ordered.append(node)
+                if len(ordered) == len(self.nodes):
+                    break
+        return ordered
+
+
+class ReplicaPool:
+    """
+    Tracks replica health and per-replica routing counters.
+    """
+    def __init__(self, replicas: List[str]):
+        self.ring = HashRing(replicas)
+        self.healthy: Dict[str, bool] = {replica: False for replica in replicas}
+        self.routed: Dict[str, int] = {replica: 0 for replica in replicas}
+        self.failovers: Dict[str, int] = {replica: 0 for replica in replicas}
+        self.failures: Dict[str, int] = {replica: 0 for replica in replicas}
+        self.session = requests.Session()
+
+    def check(self, replica: str) -> bool:
+        try:
+            response = self.session.get(f"{replica}/", timeout=2)
+            return response.ok and response.json().get("ready", False)
+        except (requests.RequestException, ValueError):
+            return False
+
+    async def health_loop(self):
+        while True:
+            for replica in self.healthy:
+                healthy = await run_in_threadpool(self.check, replica)
+                if healthy != self.healthy[replica]:
+                    logger.info(f"Replica {replica} is now {'healthy' if healthy else 'unhealthy'}")
+                self.healthy[replica] = healthy
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+    def candidates(self, image_hash: str) -> List[str]:
+        """Healthy replicas in ring order for the image, owner first."""
+        return [replica for replica in self.ring.preference_list(image_hash) if self.healthy[replica]]
+
+    def forward(self, image_hash: str, path: str, data: Dict, files: Optional[Dict] = None) -> requests.Response:
+        """
+        Sends the request to the owner of the image, failing over along the ring on
+        connection errors, timeouts and FAILOVER_STATUS responses.
+
+        Raises:
+            HTTPException: 503 if no healthy replica could serve the request.
+        """
+        candidates = self.candidates(image_hash)
+        owner = self.ring.preference_list(image_hash)[0]
+        for replica in candidates:
+            try:
+                response = self.session.post(f"{replica}{path}", data=data, files=files, timeout=REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logger.warning(f"Replica {replica} failed: {e}")
+                self.failures[replica] += 1
+                self.healthy[replica] = False
+                continue
+            if response.status_code in FAILOVER_STATUS:
+                self.failures[replica] += 1
+                continue
+            self.routed[replica] += 1
+            if replica != owner:
+                self.failovers[replica] += 1
+            return response
+        raise HTTPException(status_code=503, detail="No healthy VQA replica available")
+
+    def cache_stats(self, replica: str) -> Optional[Dict]:
+        try:
+            return self.session.get(f"{replica}/vqa/cache/stats", timeout=2).json()
+        except (requests.RequestException, ValueError):
+            return None
+
+
+def _relay(response: requests.Response):
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        raise HTTPException(status_code=response.status_code, detail=detail)
+    return response.json()
+
+
+def create_app(replicas: List[str]) -> FastAPI:
+    """Builds the router app in front of the given replica base URLs."""
+    pool = ReplicaPool(replicas)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        task = asyncio.create_task(pool.health_loop())
+        yield
+        task.cancel()
+
+    app = FastAPI(
+        title="Vietnamese VQA API Router",
+        description="Cache-affinity load balancer for VQA API replicas",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.pool = pool
+
+    @app.post("/vqa/predict")
+    async def predict_with_file(
+        image: UploadFile = File(...),
+        question: str = Form(...),
+        top_k: int = Form(5)
+    ):
+        image_data = await image.read()
+        response = await run_in_threadpool(
+            pool.forward,
+            compute_image_hash(image_data),
+            "/vqa/predict",
+            {"question": question, "top_k": top_k},
+            {"image": (image.filename or "image", image_data, image.content_type)}
+        )
+        return _relay(response)
+
+    @app.post("/vqa/predict_base64")
+    async def predict_with_base64(
+        image_base64: str = Form(...),
+        question: str = Form(...),
+        top_k: int = Form(5)
+    ):
+        try:
+            image_hash = compute_image_hash(base64.b64decode(image_base64))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid base64 image: {str(e)}")
+        response = await run_in_threadpool(
+            pool.forward,
+            image_hash,
+            "/vqa/predict_base64",
+            {"image_base64": image_base64, "question": question, "top_k": top_k}
+        )
+        return _relay(response)
+
+    @app.get("/")
+    async def health_check():
+        """Router is ready when at least one replica is healthy"""
+        return {
+            "status": "ok",
+            "message": "Vietnamese VQA API router is running",
+            "ready": any(pool.healthy.values())
+        }
+
+    @app.get("/router/stats")
+    async def router_stats():
+        """Per-replica health, routing counters and the cache hit ratio each replica achieves"""
+        stats = {}
+        for replica in replicas:
+            cache = await run_in_threadpool(pool.cache_stats, replica)
+            stats[replica] = {
+                "healthy": pool.healthy[replica],
+                "routed": pool.routed[replica],
+                "failovers": pool.failovers[replica],
+                "failures": pool.failures[replica],
+                "embedding_cache_hit_rate": ((cache or {}).get("embedding_cache") or {}).get("hit_rate"),
+                "response_cache_hit_rate": ((cache or {}).get("response_cache") or {}).get("hit_rate")
+            }
+        return stats
+
+    return app
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Cache-affinity load balancer for VQA API replicas")
+    p.add_argument("--replicas", type=str, nargs="+", required=True, help="Replica base URLs")
+    p.add_argument("--host", type=str, default="0.0.0.0")
+    p.add_argument("--port", type=int, default=1235)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    uvicorn.run(create_app([replica.rstrip("/") for replica in args.replicas]), host=args.host, port=args.port)
@@ -1,10 +1,14 @@
 import os
 import sys
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from huggingface_hub import hf_hub_download
 import torch
+import time
 import logging
+from typing import Optional
+from PIL import Image
 
 os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 # Add project root to Python path
@@ -17,52 +21,206 @@ vivqax_src_path = os.path.join(project_root, 'ViVQA-X', 'src')
 if vivqax_src_path not in sys.path:
     sys.path.insert(0, vivqax_src_path)
 
-from api.vqa_router import router as vqa_router
+from api.vqa_router import router as vqa_router, predict_vqa
+from api.utils.processor import Processor
+from api.utils.embedding_cache import ImageEmbeddingCache, install_image_embedding_cache
+from api.utils.response_cache import ResponseCache
+from api.utils.runtime import ExportedAnswerModel, check_exported_backend
+from api.utils.streaming import resolve_stream_modules
+from api.utils.quantization import model_memory_bytes, quantize_model
+from api.utils.metrics import MODEL_MEMORY, REQUEST_LATENCY, REQUESTS, render_metrics
+from api.utils.model_loader import (
+    WEIGHTS_FILENAME,
+    artifacts_exist,
+    build_model,
+    convert_checkpoint,
+    load_meta,
+    mmap_safetensors,
+    peak_rss_mb
+)
 from models.baseline_model.vivqax_model import ViVQAX_Model
 
+# Checkpoint source and directory holding the converted safetensors weights + JSON sidecar
+HF_REPO_ID = "VLAI-AIVN/ViVQA-X_LSTM-Generative"
+HF_FILENAME = "best_model.pth"
+ARTIFACT_DIR = os.getenv("VQA_ARTIFACT_DIR", os.path.join(project_root, "checkpoints", "vivqax"))
+WARMUP_QUESTION = "trong ảnh có gì"
+
+# Answer-path serving backend: eager, torchscript or onnx (see script/export_vqa_model.py)
+BACKEND = os.getenv("VQA_BACKEND", "eager")
+EXPORT_PATH = os.getenv("VQA_EXPORT_PATH")
+NUM_THREADS = int(os.getenv("VQA_NUM_THREADS", "0")) or None
+
+# Eager model precision: none, int8 (dynamic, CPU only), fp16 or bf16
+QUANTIZATION = os.getenv("VQA_QUANTIZATION", "none")
+
+# Image embedding cache bounds (0 entries disables the cache)
+EMBEDDING_CACHE_SIZE = int(os.getenv("VQA_EMBEDDING_CACHE_SIZE", "256"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("VQA_EMBEDDING_CACHE_MAX_MB", "512"))
+
+# Response cache bounds (0 entries disables the cache)
+RESPONSE_CACHE_SIZE = int(os.getenv("VQA_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("VQA_RESPONSE_CACHE_TTL", "3600"))
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def load_model_state(app: FastAPI, warmup: bool = True):
+    """
+    Load model, processor and caches into app.state, logging the time for each phase.
+
+    Args:
+        app: FastAPI application whose state is populated
+        warmup: Run a warm-up forward and mark the app ready. The prefork server loads
+            without warm-up in the parent and warms up each forked worker instead.
+    """
+    app.state.ready = False
+    timings = {}
+    startup_start = time.perf_counter()
+
+    # Load device
+    app.state.device = os.getenv("VQA_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+    logger.info(f"Using device: {app.state.device}")
+
+    # One-time conversion of the pickled checkpoint into mmap-able weights + JSON sidecar
+    phase_start = time.perf_counter()
+    if not artifacts_exist(ARTIFACT_DIR):
+        logger.info(f"No converted weights in {ARTIFACT_DIR}, converting checkpoint...")
+        checkpoint_path = hf_hub_download(
+            repo_id=HF_REPO_ID,
+            filename=HF_FILENAME
+        )
+        convert_checkpoint(checkpoint_path, ARTIFACT_DIR)
+    timings["resolve_artifacts"] = time.perf_counter() - phase_start
+
+    # Load only config and vocabularies needed for inference
+    phase_start = time.perf_counter()
+    cfg, word2idx, idx2answer = load_meta(ARTIFACT_DIR)
+    app.state.config = cfg
+    app.state.idx2answer = idx2answer
+    app.state.idx2word = {idx: word for word, idx in word2idx.items()}
+    timings["load_meta"] = time.perf_counter() - phase_start
+
+    # Map weights from disk and bind them to the model without copying
+    logger.info("Loading ViVQA model...")
+    phase_start = time.perf_counter()
+    state_dict = mmap_safetensors(os.path.join(ARTIFACT_DIR, WEIGHTS_FILENAME))
+    model, app.state.weights_mmapped = build_model(
+        ViVQAX_Model, cfg, word2idx, len(idx2answer), state_dict
+    )
+    app.state.model = model.to(app.state.device)
+    app.state.model.eval()
+    timings["load_model"] = time.perf_counter() - phase_start
+
+    # Optional reduced-precision serving to fit more replicas per node
+    phase_start = time.perf_counter()
+    app.state.quantization = QUANTIZATION
+    app.state.model = quantize_model(app.state.model, QUANTIZATION, app.state.device)
+    # Drop the mapped state dict so fp32 weights replaced by quantization are released
+    # before the prefork server forks; the model still references the ones it uses
+    del state_dict
+    MODEL_MEMORY.set(model_memory_bytes(app.state.model))
+    timings["quantize"] = time.perf_counter() - phase_start
+
+    # Layers hooked by /predict_stream, resolved after quantization has replaced them
+    app.state.stream_modules = resolve_stream_modules(app.state.model, len(idx2answer), len(word2idx))
+
+    # Runtime sessions and their thread pools are not fork-safe, so the prefork server
+    # builds the answer backend in each worker (see lifespan)
+    app.state.backend = BACKEND
+    app.state.answer_model = None
+    check_exported_backend(EXPORT_PATH, BACKEND)
+    if warmup:
+        timings["load_backend"] = load_answer_backend(app)
+
+    # Build processor once so requests don't re-create it per call
+    app.state.processor = Processor(
+        word2idx=word2idx,
+        max_question_length=cfg.get('max_question_length', 20)
+    )
+
+    if warmup:
+        timings["warmup"] = warmup_model(app)
+
+    # Reuse visual encoder output across questions about the same image
+    app.state.embedding_cache = None
+    if EMBEDDING_CACHE_SIZE > 0:
+        cache = ImageEmbeddingCache(
+            max_entries=EMBEDDING_CACHE_SIZE,
+            max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+        )
+        # Kept even when the encoder is missing, so the stats report it as disabled
+        install_image_embedding_cache(app.state.model, cache)
+        app.state.embedding_cache = cache
+
+    # Serve repeated and concurrent identical requests from one computation
+    app.state.response_cache = None
+    if RESPONSE_CACHE_SIZE > 0:
+        app.state.response_cache = ResponseCache(
+            max_entries=RESPONSE_CACHE_SIZE,
+            ttl_seconds=RESPONSE_CACHE_TTL
+        )
+
+    timings["total"] = time.perf_counter() - startup_start
+    app.state.startup_timings = timings
+    for phase, seconds in timings.items():
+        logger.info(f"Startup phase {phase}: {seconds:.2f}s")
+    logger.info(f"Peak resident memory after startup: {peak_rss_mb():.1f} MB")
+
+
+def load_answer_backend(app: FastAPI, num_threads: Optional[int] = NUM_THREADS) -> float:
+    """
+    Set app.state.answer_model for the configured backend and return the time it took.
+
+    Exported runtimes serve the answer path; the eager model still backs explanation streaming.
+
+    Args:
+        app: FastAPI application whose state is populated
+        num_threads: Intra-op threads, None keeps the runtime default
+    """
+    phase_start = time.perf_counter()
+    if BACKEND == "eager":
+        app.state.answer_model = app.state.model
+        if num_threads:
+            torch.set_num_threads(num_threads)
+    else:
+        app.state.answer_model = ExportedAnswerModel(EXPORT_PATH, BACKEND, num_threads)
+    return time.perf_counter() - phase_start
+
+
+def warmup_model(app: FastAPI) -> float:
+    """Run a warm-up forward so the first request doesn't pay lazy init costs, then mark ready"""
+    phase_start = time.perf_counter()
+    predict_vqa(
+        app.state.answer_model,
+        app.state.device,
+        app.state.processor,
+        app.state.idx2answer,
+        Image.new('RGB', app.state.processor.image_size, (128, 128, 128)),
+        WARMUP_QUESTION,
+        top_k=1
+    )
+    app.state.ready = True
+    return time.perf_counter() - phase_start
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load model and processor on startup, cleanup on shutdown"""
     try:
-        # Load device
-        app.state.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Using device: {app.state.device}")
-        
-        # Load model
-        logger.info("Loading ViVQA model...")
-        checkpoint_path = hf_hub_download(
-            repo_id="VLAI-AIVN/ViVQA-X_LSTM-Generative",
-            filename="best_model.pth"
-        )
+        # The prefork server maps the weights before forking; workers build their own
+        # answer backend and warm up
+        if getattr(app.state, 'model', None) is None:
+            load_model_state(app)
+        elif not getattr(app.state, 'ready', False):
+            # Forked workers keep the thread count set by the prefork server
+            seconds = load_answer_backend(app, torch.get_num_threads())
+            logger.info(f"Startup phase load_backend: {seconds:.2f}s")
+            seconds = warmup_model(app)
+            logger.info(f"Startup phase warmup: {seconds:.2f}s")
 
-        # Load checkpoint first
-        state = torch.load(checkpoint_path, map_location=app.state.device)
-        app.state.ckpt = state
-
-        cfg = state['config']
-        word2idx = state['word2idx']
-        answer2idx = state['answer2idx']
-
-        # Build model using sizes from checkpoint (per HF docs)
-        app.state.model = ViVQAX_Model(
-            vocab_size=len(word2idx),
-            embed_size=cfg['model']['embed_size'],
-            hidden_size=cfg['model']['hidden_size'],
-            num_layers=cfg['model']['num_layers'],
-            num_answers=len(answer2idx),
-            max_explanation_length=cfg['model']['max_explanation_length'],
-            word2idx=word2idx
-        ).to(app.state.device)
-
-        app.state.model.load_state_dict(state["model_state_dict"])
-        app.state.model.eval()
-        
-        
         logger.info("Model loaded successfully!")
         yield
         
@@ -86,13 +244,52 @@ app = FastAPI(
 app.include_router(vqa_router, prefix="/vqa", tags=["VQA"])
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and record end-to-end latency per route template and status"""
+    start = time.perf_counter()
+
+    def record(status: int):
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        REQUESTS.inc(endpoint=endpoint, status=status)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        record(500)
+        raise
+
+    # Streaming routes keep producing after the headers are sent, so latency is recorded
+    # once the body has been fully sent
+    body_iterator = response.body_iterator
+
+    async def body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            record(response.status_code)
+
+    response.body_iterator = body()
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of per-stage latency, request, batch and memory metrics"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 async def health_check():
     """Simple health check endpoint"""
     return {
         "status": "ok",
         "message": "Vietnamese VQA API is running",
-        "model_loaded": hasattr(app.state, 'model') and app.state.model is not None
+        "model_loaded": hasattr(app.state, 'model') and app.state.model is not None,
+        "ready": getattr(app.state, 'ready', False)
     }
 
 
@@ -0,0 +1,141 @@
+"""
+Preforking server for the VQA API.
+
+The model is loaded once in the parent process and workers are forked afterwards, so they
+share the (copy-on-write mmap'd) weights instead of each loading their own copy. All workers
+accept connections from one listening socket.
+
+Usage:
+    python -m api.serve --workers 4 --threads-per-worker 2 --port 1235
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+
+# Forked workers can't share a CUDA context, so prefork serving runs on CPU
+os.environ.setdefault("VQA_DEVICE", "cpu")
+
+import torch
+import uvicorn
+
+from api.main import app, load_model_state
+
+logger = logging.getLogger(__name__)
+
+# A worker exiting within this many seconds of its start failed during startup; restarts
+# back off exponentially and the server gives up after MAX_STARTUP_FAILURES in a row
+STARTUP_GRACE_SECONDS = 60.0
+MAX_STARTUP_FAILURES = 5
+MAX_RESTART_BACKOFF = 30.0
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Serve the VQA API from forked workers sharing one model")
+    p.add_argument("--host", type=str, default="0.0.0.0")
+    p.add_argument("--port", type=int, default=1235)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--threads-per-worker", type=int, default=1,
+                   help="torch intra-op threads in each worker")
+    p.add_argument("--backlog", type=int, default=2048)
+    return p.parse_args()
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, threads: int):
+    """Worker process body: serve the already-loaded app on the shared socket."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    torch.set_num_threads(threads)
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    args = parse_args()
+
+    # Load once in the parent without warm-up or the exported runtime: running OpenMP kernels
+    # or creating runtime thread pools before fork can deadlock the children, so each worker
+    # builds its answer backend and warms up in its own lifespan instead.
+    load_model_state(app, warmup=False)
+    # Cast (fp16/bf16) or rebuilt weights live in private memory; int8 is quantized in place,
+    # so its remaining fp32 weights are still mapped and its packed weights are not parameters
+    if not app.state.weights_mmapped or app.state.quantization in ("fp16", "bf16"):
+        app.state.model.share_memory()
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info(f"Listening on {args.host}:{args.port} with {args.workers} workers")
+
+    # pid -> start time
+    workers = {spawn_worker(sock, args.threads_per_worker): time.monotonic() for _ in range(args.workers)}
+    shutting_down = False
+    exit_code = 0
+    startup_failures = 0
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    # Supervise workers, replacing any that die unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if shutting_down:
+            continue
+
+        if started is not None and time.monotonic() - started < STARTUP_GRACE_SECONDS:
+            startup_failures += 1
+        else:
+            startup_failures = 0
+        if startup_failures >= MAX_STARTUP_FAILURES:
+            logger.error(f"{startup_failures} workers in a row exited during startup, giving up")
+            exit_code = 1
+            shutdown(None, None)
+            continue
+
+        delay = min(2 ** (startup_failures - 1), MAX_RESTART_BACKOFF) if startup_failures else 0
+        logger.warning(f"Worker {pid} exited with status {status}, restarting in {delay:g}s")
+        time.sleep(delay)
+        if not shutting_down:
+            workers[spawn_worker(sock, args.threads_per_worker)] = time.monotonic()
+
+    sock.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
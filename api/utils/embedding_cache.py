@@ -0,0 +1,170 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Union
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+# Dotted name of the visual encoder submodule on ViVQAX_Model
+IMAGE_ENCODER_MODULE = os.getenv("VQA_IMAGE_ENCODER_MODULE", "image_encoder")
+
+# Content hashes of the images in the batch currently being encoded, one per row
+_current_image_keys: ContextVar[Optional[List[str]]] = ContextVar("image_keys", default=None)
+
+EncoderOutput = Union[torch.Tensor, tuple, list]
+
+
+@contextmanager
+def image_keys(keys: Optional[Sequence[str]]):
+    """Binds the content hashes of the current batch so the cached encoder can look them up."""
+    token = _current_image_keys.set(list(keys) if keys is not None else None)
+    try:
+        yield
+    finally:
+        _current_image_keys.reset(token)
+
+
+def _nbytes(output: EncoderOutput) -> int:
+    if isinstance(output, torch.Tensor):
+        return output.element_size() * output.nelement()
+    return sum(_nbytes(item) for item in output)
+
+
+def _select_row(output: EncoderOutput, row: int) -> EncoderOutput:
+    if isinstance(output, torch.Tensor):
+        return output[row:row + 1].detach().clone()
+    return type(output)(_select_row(item, row) for item in output)
+
+
+def _concat_rows(rows: List[EncoderOutput]) -> EncoderOutput:
+    first = rows[0]
+    if isinstance(first, torch.Tensor):
+        return torch.cat(rows, dim=0)
+    return type(first)(_concat_rows([row[i] for row in rows]) for i in range(len(first)))
+
+
+class ImageEmbeddingCache:
+    """
+    Bounded LRU of visual encoder outputs keyed by image content hash.
+    """
+    def __init__(self, max_entries: int = 256, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached images.
+            max_bytes (int): Maximum total size of cached tensors in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, EncoderOutput]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Set by install_image_embedding_cache when the model has no encoder to wrap
+        self.disabled_reason: Optional[str] = None
+
+    def get(self, key: str) -> Optional[EncoderOutput]:
+        """Returns the cached encoder output for key, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: EncoderOutput):
+        """Stores an encoder output, evicting least recently used entries to stay in bounds."""
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Union[int, float, bool, str, None]]:
+        """Returns hit rate and memory use of the cache, and whether it is installed at all."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.disabled_reason is None,
+                "disabled_reason": self.disabled_reason,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class CachedImageEncoder(nn.Module):
+    """
+    Wraps the model's visual encoder and serves rows whose image hash is already cached.
+
+    Only the rows that miss are run through the wrapped encoder. When no image keys are
+    bound for the current call (or they don't line up with the batch), the encoder is
+    called unchanged.
+    """
+    def __init__(self, encoder: nn.Module, cache: ImageEmbeddingCache):
+        super().__init__()
+        self.encoder = encoder
+        self.cache = cache
+
+    def forward(self, image: torch.Tensor, *args, **kwargs):
+        keys = _current_image_keys.get()
+        if args or kwargs or keys is None or len(keys) != image.shape[0]:
+            return self.encoder(image, *args, **kwargs)
+
+        rows: List[Optional[EncoderOutput]] = [self.cache.get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            computed = self.encoder(image[missing])
+            for position, i in enumerate(missing):
+                rows[i] = _select_row(computed, position)
+                self.cache.put(keys[i], rows[i])
+
+        return _concat_rows(rows)
+
+
+def install_image_embedding_cache(model: nn.Module, cache: ImageEmbeddingCache) -> bool:
+    """
+    Replaces the model's visual encoder with a cached wrapper.
+
+    Returns:
+        bool: True if the cache was installed. False if the model has no IMAGE_ENCODER_MODULE
+            (set VQA_IMAGE_ENCODER_MODULE); the cache then reports enabled: false in its stats.
+    """
+    parent_name, _, attr = IMAGE_ENCODER_MODULE.rpartition(".")
+    try:
+        parent = model.get_submodule(parent_name)
+        encoder = getattr(parent, attr)
+    except AttributeError:
+        cache.disabled_reason = f"model has no '{IMAGE_ENCODER_MODULE}' submodule"
+        logger.error(f"Image embedding cache disabled: {cache.disabled_reason}; set VQA_IMAGE_ENCODER_MODULE")
+        return False
+    if not isinstance(encoder, CachedImageEncoder):
+        setattr(parent, attr, CachedImageEncoder(encoder, cache))
+    cache.disabled_reason = None
+    return True
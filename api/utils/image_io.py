@@ -0,0 +1,51 @@
+import io
+import os
+import hashlib
+from typing import Tuple
+
+from PIL import Image
+
+# Upper bounds on uploaded images, checked before any pixel data is decoded
+MAX_IMAGE_BYTES = int(os.getenv("VQA_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("VQA_MAX_IMAGE_PIXELS", str(50_000_000)))
+
+
+def compute_image_hash(image_data: bytes) -> str:
+    """Returns a content hash for raw image bytes."""
+    return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an uploaded image exceeds the configured size limits."""
+
+
+def decode_image(image_data: bytes, target_size: Tuple[int, int] = (224, 224)) -> Image.Image:
+    """
+    Decodes image bytes into an RGB image, close to the size the model actually needs.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale by 1/2, 1/4 or 1/8 in the DCT
+    domain while keeping both sides at least as large as target_size. Other formats are
+    decoded at full resolution.
+
+    Args:
+        image_data (bytes): Raw encoded image.
+        target_size (Tuple[int, int]): (width, height) the image will be resized to afterwards.
+
+    Returns:
+        PIL.Image.Image: The decoded RGB image.
+
+    Raises:
+        ImageTooLargeError: If the encoded size or pixel count exceeds the configured limits.
+    """
+    if len(image_data) > MAX_IMAGE_BYTES:
+        raise ImageTooLargeError(f"Image exceeds {MAX_IMAGE_BYTES} bytes")
+
+    # Image.open only parses the header, so the pixel count is known before decoding
+    image = Image.open(io.BytesIO(image_data))
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(f"Image of {width}x{height} exceeds {MAX_IMAGE_PIXELS} pixels")
+
+    if image.format == "JPEG":
+        image.draft("RGB", target_size)
+    return image.convert("RGB")
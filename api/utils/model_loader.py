@@ -0,0 +1,154 @@
+import json
+import mmap
+import os
+import struct
+import logging
+from typing import Any, Dict, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILENAME = "model.safetensors"
+META_FILENAME = "vivqax_meta.json"
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def artifacts_exist(artifact_dir: str) -> bool:
+    """Checks whether a converted weights file and vocab/config sidecar are present."""
+    return (os.path.isfile(os.path.join(artifact_dir, WEIGHTS_FILENAME))
+            and os.path.isfile(os.path.join(artifact_dir, META_FILENAME)))
+
+
+def convert_checkpoint(checkpoint_path: str, artifact_dir: str) -> None:
+    """
+    Converts a pickled ViVQA-X checkpoint into a safetensors weights file plus a JSON sidecar.
+
+    Args:
+        checkpoint_path (str): Path to best_model.pth.
+        artifact_dir (str): Output directory for model.safetensors and vivqax_meta.json.
+    """
+    from safetensors.torch import save_file
+
+    state = torch.load(checkpoint_path, map_location="cpu")
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    weights = {name: tensor.contiguous() for name, tensor in state["model_state_dict"].items()}
+    save_file(weights, os.path.join(artifact_dir, WEIGHTS_FILENAME))
+
+    meta = {
+        "config": state["config"],
+        "word2idx": state["word2idx"],
+        "idx2answer": {str(idx): answer for idx, answer in state["idx2answer"].items()},
+    }
+    with open(os.path.join(artifact_dir, META_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, default=str)
+
+    logger.info(f"Converted {checkpoint_path} -> {artifact_dir}")
+
+
+def load_meta(artifact_dir: str) -> Tuple[Dict[str, Any], Dict[str, int], Dict[int, str]]:
+    """
+    Loads the config and vocabularies written by convert_checkpoint.
+
+    Returns:
+        tuple: (config, word2idx, idx2answer)
+    """
+    with open(os.path.join(artifact_dir, META_FILENAME), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    idx2answer = {int(idx): answer for idx, answer in meta["idx2answer"].items()}
+    return meta["config"], meta["word2idx"], idx2answer
+
+
+def mmap_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Memory-maps a safetensors file and returns tensors that view the mapped pages.
+
+    The file is mapped copy-on-write, so pages are only read from disk when touched and are
+    shared between processes until one of them writes to a tensor.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + begin
+        ).view(info["shape"])
+    return tensors
+
+
+def build_model(model_cls, config: Dict[str, Any], word2idx: Dict[str, int],
+                num_answers: int, state_dict: Dict[str, torch.Tensor]) -> Tuple[torch.nn.Module, bool]:
+    """
+    Builds the model without random initialization and binds the given weights in place.
+
+    The model is constructed on the meta device and weights are assigned rather than copied.
+    If the model keeps tensors that are not in the state dict, it is rebuilt normally.
+
+    Returns:
+        tuple: (model, assigned) where assigned is True if the model uses state_dict tensors directly.
+    """
+    kwargs = dict(
+        vocab_size=len(word2idx),
+        embed_size=config['model']['embed_size'],
+        hidden_size=config['model']['hidden_size'],
+        num_layers=config['model']['num_layers'],
+        num_answers=num_answers,
+        max_explanation_length=config['model']['max_explanation_length'],
+        word2idx=word2idx
+    )
+
+    with torch.device("meta"):
+        model = model_cls(**kwargs)
+    model.load_state_dict(state_dict, assign=True)
+
+    tensors = list(model.parameters()) + list(model.buffers())
+    if any(t.is_meta for t in tensors):
+        logger.warning("Model has tensors outside its state dict, falling back to regular construction")
+        model = model_cls(**kwargs)
+        model.load_state_dict(state_dict)
+        return model, False
+    return model, True
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB."""
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_model(model_cls, artifact_dir: str, device: str = "cpu"):
+    """
+    Loads a converted checkpoint for offline use (export, benchmarks).
+
+    Returns:
+        tuple: (model in eval mode, config, word2idx, idx2answer)
+    """
+    cfg, word2idx, idx2answer = load_meta(artifact_dir)
+    state_dict = mmap_safetensors(os.path.join(artifact_dir, WEIGHTS_FILENAME))
+    model, _ = build_model(model_cls, cfg, word2idx, len(idx2answer), state_dict)
+    return model.to(device).eval(), cfg, word2idx, idx2answer
@@ -17,8 +17,9 @@ class Processor:
         """
         self.word2idx = word2idx
         self.max_question_length = max_question_length
+        self.image_size = (224, 224)
         self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
+            transforms.Resize(self.image_size),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485, 0.456, 0.406],
                               std=[0.229, 0.224, 0.225])
@@ -57,4 +58,31 @@ class Processor:
         return {
             "image": processed_image.unsqueeze(0), # Add batch dimension
             "question": processed_question.unsqueeze(0) # Add batch dimension
-        } 
\ No newline at end of file
+        }
+
+    def batch(self, images: List[Image.Image], questions: List[str]):
+        """
+        Processes a list of images and questions into stacked batch tensors.
+
+        Args:
+            images (List[PIL.Image.Image]): The input images.
+            questions (List[str]): The input questions, aligned with images.
+
+        Returns:
+            dict: A dictionary containing batched image and question tensors.
+        """
+        return {
+            "image": self.transform_images(images),
+            "question": self.encode_questions(questions)
+        }
+
+    def transform_images(self, images: List[Image.Image]) -> torch.Tensor:
+        """Resizes and normalizes images into a stacked batch tensor."""
+        return torch.stack([self.transform(image) for image in images])
+
+    def encode_questions(self, questions: List[str]) -> torch.Tensor:
+        """Tokenizes and pads questions into a stacked batch tensor of indices."""
+        return torch.stack([
+            torch.LongTensor(self.pad_sequence(self.tokenize(question), self.max_question_length))
+            for question in questions
+        ]) 
\ No newline at end of file
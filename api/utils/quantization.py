@@ -0,0 +1,63 @@
+import io
+
+import torch
+import torch.nn as nn
+
+# Serving precisions for the eager model
+QUANTIZATION_MODES = ("none", "int8", "fp16", "bf16")
+
+
+def quantize_model(model: nn.Module, mode: str, device: str = "cpu") -> nn.Module:
+    """
+    Converts a loaded fp32 model to a lower serving precision, in place.
+
+    int8 swaps the LSTM and Linear modules for quantized ones without deep-copying the
+    model, so the remaining (e.g. mmap'd) fp32 weights stay shared.
+
+    Args:
+        model (nn.Module): Loaded model in eval mode.
+        mode (str): "none", "int8" (dynamic int8 on LSTM and Linear layers, CPU only),
+            "fp16" or "bf16" (all weights cast).
+        device (str): Device the model will be served on.
+
+    Returns:
+        nn.Module: The converted model (the same object).
+    """
+    if mode == "none":
+        return model
+    if mode == "int8":
+        if device != "cpu":
+            raise ValueError("Dynamic int8 quantization is only supported on CPU")
+        return torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8, inplace=True)
+    if mode == "fp16":
+        return model.half()
+    if mode == "bf16":
+        return model.to(torch.bfloat16)
+    raise ValueError(f"Unknown quantization mode: {mode}, expected one of {QUANTIZATION_MODES}")
+
+
+def input_dtype(model) -> torch.dtype:
+    """Returns the floating dtype image inputs must have for the model."""
+    if isinstance(model, nn.Module):
+        for param in model.parameters():
+            if param.is_floating_point():
+                return param.dtype
+    return torch.float32
+
+
+def model_size_mb(model: nn.Module) -> float:
+    """Returns the serialized size of the model weights in MB, including packed int8 weights."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def model_memory_bytes(model: nn.Module) -> int:
+    """Returns the bytes held by the model's state tensors, including packed int8 Linear weights."""
+    total = 0
+    for value in model.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            total += sum(t.numel() * t.element_size() for t in value if isinstance(t, torch.Tensor))
+    return total
@@ -0,0 +1,118 @@
+import asyncio
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+
+def normalize_question(question: str) -> str:
+    """Normalizes a question so trivially different spellings share a cache entry."""
+    question = unicodedata.normalize("NFC", question)
+    return " ".join(question.lower().split())
+
+
+def response_cache_key(image_hash: str, question: str, top_k: int) -> str:
+    """Builds the response cache key from image hash, normalized question and top_k."""
+    return f"{image_hash}|{top_k}|{normalize_question(question)}"
+
+
+class ResponseCache:
+    """
+    TTL- and size-bounded cache of prediction responses with in-flight request coalescing.
+
+    Identical requests that arrive while the first one is still being computed await the
+    same pending computation instead of starting a new forward pass.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses.
+            ttl_seconds (float): Time after which a cached response expires.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached response for key, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Stores a response, evicting least recently used entries beyond max_entries."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached response for key, joining or starting the computation on a miss.
+
+        Args:
+            key (str): Cache key from response_cache_key.
+            compute (Callable): Coroutine factory producing the response.
+
+        Returns:
+            The cached or freshly computed response. Failures are not cached and are
+            raised to every request waiting on the same computation. The computation runs
+            as its own task, so cancelling the request that started it (e.g. a client
+            disconnect) does not cancel it for the other waiters.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._compute(key, compute))
+        # Mark a failure retrieved so one without remaining waiters is not logged as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self.put(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Returns hit, coalescing and eviction counters of the cache."""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
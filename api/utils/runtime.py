@@ -0,0 +1,131 @@
+import os
+import logging
+from typing import Optional
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+# Serving backends for the answer path
+BACKENDS = ("eager", "torchscript", "onnx")
+
+ONNX_INPUT_NAMES = ["image", "question"]
+ONNX_OUTPUT_NAMES = ["answer_logits"]
+
+
+def check_exported_backend(path: Optional[str], backend: str) -> None:
+    """
+    Checks that an exported backend can be loaded, without creating a runtime session.
+
+    Meant for the prefork parent, which must not create runtime thread pools before fork.
+
+    Raises:
+        ValueError: If the backend is unknown or the artifact path is missing.
+        ImportError: If onnxruntime is not installed for the onnx backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}, expected one of {BACKENDS}")
+    if backend == "eager":
+        return
+    if not path or not os.path.isfile(path):
+        raise ValueError(f"Exported {backend} artifact not found: {path!r} (set VQA_EXPORT_PATH)")
+    if backend == "onnx":
+        import onnxruntime  # noqa: F401
+
+
+class AnswerPath(nn.Module):
+    """
+    Answer-only view of ViVQAX_Model for export: (image, question) -> answer logits.
+
+    Runs the model forward without explanation decoding and returns its first output.
+    """
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image: torch.Tensor, question: torch.Tensor) -> torch.Tensor:
+        outputs = self.model(image, question)
+        if isinstance(outputs, (tuple, list)):
+            return outputs[0]
+        return outputs
+
+
+class ExportedAnswerModel:
+    """
+    Answer path served from an exported TorchScript or ONNX artifact.
+    """
+    def __init__(self, path: str, backend: str, num_threads: Optional[int] = None):
+        """
+        Loads the exported artifact.
+
+        Args:
+            path (str): Path to the .pt (TorchScript) or .onnx file.
+            backend (str): "torchscript" or "onnx".
+            num_threads (int): Intra-op threads for the runtime, None keeps the default.
+        """
+        self.backend = backend
+        if backend == "torchscript":
+            if num_threads:
+                torch.set_num_threads(num_threads)
+            self.module = torch.jit.optimize_for_inference(torch.jit.load(path, map_location="cpu").eval())
+        elif backend == "onnx":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+            self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        else:
+            raise ValueError(f"Unsupported exported backend: {backend}")
+
+    def __call__(self, image: torch.Tensor, question: torch.Tensor) -> torch.Tensor:
+        if self.backend == "torchscript":
+            with torch.no_grad():
+                return self.module(image.cpu(), question.cpu())
+        outputs = self.session.run(
+            ONNX_OUTPUT_NAMES,
+            {"image": image.cpu().numpy(), "question": question.cpu().numpy()}
+        )
+        return torch.from_numpy(outputs[0])
+
+
+def export_answer_path(model: nn.Module, image: torch.Tensor, question: torch.Tensor,
+                       path: str, backend: str) -> None:
+    """
+    Exports the answer path of a loaded model.
+
+    Args:
+        model (nn.Module): Loaded ViVQAX_Model in eval mode, on CPU.
+        image (torch.Tensor): Example image batch used for tracing.
+        question (torch.Tensor): Example question batch used for tracing.
+        path (str): Output file path.
+        backend (str): "torchscript" or "onnx".
+    """
+    answer_path = AnswerPath(model).eval()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with torch.no_grad():
+        if backend == "torchscript":
+            traced = torch.jit.trace(answer_path, (image, question))
+            torch.jit.save(traced, path)
+        elif backend == "onnx":
+            torch.onnx.export(
+                answer_path,
+                (image, question),
+                path,
+                input_names=ONNX_INPUT_NAMES,
+                output_names=ONNX_OUTPUT_NAMES,
+                dynamic_axes={
+                    "image": {0: "batch"},
+                    "question": {0: "batch"},
+                    "answer_logits": {0: "batch"}
+                },
+                opset_version=17
+            )
+        else:
+            raise ValueError(f"Unsupported exported backend: {backend}")
+
+    logger.info(f"Exported {backend} answer path to {path}")
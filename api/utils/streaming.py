@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+# Special tokens that are never surfaced in explanations
+SPECIAL_TOKENS = ['<PAD>', '<UNK>', '<START>', '<END>']
+
+# Dotted names of the ViVQAX_Model submodules producing answer logits and per-step vocabulary logits
+ANSWER_HEAD_MODULE = os.getenv("VQA_ANSWER_HEAD_MODULE", "answer_classifier")
+VOCAB_PROJECTION_MODULE = os.getenv("VQA_VOCAB_PROJECTION_MODULE", "explanation_generator.fc")
+
+
+def _out_features(module: nn.Module) -> Optional[int]:
+    """Output width of a Linear layer, float or dynamically quantized."""
+    out_features = getattr(module, "out_features", None)
+    return out_features() if callable(out_features) else out_features
+
+
+def resolve_stream_modules(model: nn.Module, num_answers: int, vocab_size: int) -> Tuple[nn.Module, nn.Module]:
+    """
+    Looks up the answer head and vocabulary projection hooked by DecodeStreamer.
+
+    Returns:
+        (answer_head, vocab_projection)
+
+    Raises:
+        ValueError: If a submodule is missing or its output width doesn't match, naming the
+            layers of the right width so VQA_ANSWER_HEAD_MODULE / VQA_VOCAB_PROJECTION_MODULE
+            can be set.
+    """
+    modules = []
+    for name, width, env in ((ANSWER_HEAD_MODULE, num_answers, "VQA_ANSWER_HEAD_MODULE"),
+                             (VOCAB_PROJECTION_MODULE, vocab_size, "VQA_VOCAB_PROJECTION_MODULE")):
+        try:
+            module = model.get_submodule(name)
+        except AttributeError:
+            module = None
+        out_features = _out_features(module) if module is not None else None
+        if module is None or out_features not in (None, width):
+            candidates = [n for n, m in model.named_modules() if _out_features(m) == width]
+            raise ValueError(
+                f"Model has no submodule '{name}' producing {width} outputs; set {env} "
+                f"(layers of that width: {candidates or 'none'})"
+            )
+        modules.append(module)
+    return modules[0], modules[1]
+
+
+class DecodeStreamer:
+    """
+    Forward hooks that surface intermediate results while generate_explanation runs.
+
+    The answer head fires on_answer once with the answer logits; with on_token set, every
+    later call of the vocabulary projection fires it with the greedy token ids of that step.
+    Tokens are only meaningful for single-item, beam_size=1 decoding, where the per-step
+    argmax is the emitted token.
+
+    The hooked modules are shared by every request, so hooks only react to forwards on the
+    thread that entered the streamer; concurrent requests on other threads are ignored.
+    """
+    def __init__(self, answer_head: nn.Module, vocab_projection: nn.Module,
+                 on_answer: Callable[[torch.Tensor], None],
+                 on_token: Optional[Callable[[List[int]], None]] = None):
+        self.answer_head = answer_head
+        self.vocab_projection = vocab_projection
+        self.on_answer = on_answer
+        self.on_token = on_token
+        self._answered = False
+        self._handles = []
+        self._owner: Optional[int] = None
+
+    def _answer_hook(self, module: nn.Module, inputs, output):
+        if threading.get_ident() != self._owner:
+            return
+        if not self._answered and isinstance(output, torch.Tensor):
+            self._answered = True
+            self.on_answer(output.detach().reshape(-1, output.shape[-1])[0])
+
+    def _token_hook(self, module: nn.Module, inputs, output):
+        if threading.get_ident() != self._owner:
+            return
+        if self._answered and isinstance(output, torch.Tensor):
+            self.on_token(output.detach().reshape(-1, output.shape[-1]).argmax(dim=-1).tolist())
+
+    def __enter__(self):
+        # Must be entered on the thread that runs the forward
+        self._owner = threading.get_ident()
+        self._handles.append(self.answer_head.register_forward_hook(self._answer_hook))
+        if self.on_token is not None:
+            self._handles.append(self.vocab_projection.register_forward_hook(self._token_hook))
+        return self
+
+    def __exit__(self, *exc):
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+
+def decode_tokens(token_ids: List[int], idx2word: Dict[int, str]) -> List[str]:
+    """Maps token ids to words, stopping at <END> and dropping special tokens."""
+    words = []
+    for idx in token_ids:
+        word = idx2word.get(idx, '<UNK>')
+        if word == '<END>':
+            break
+        if word not in SPECIAL_TOKENS:
+            words.append(word)
+    return words
+
+
+def end_token_seen(token_ids: List[int], idx2word: Dict[int, str]) -> bool:
+    """Checks whether a step emitted the <END> token."""
+    return any(idx2word.get(idx) == '<END>' for idx in token_ids)
+
+
+def sse_event(event: str, data: str, event_id: Optional[int] = None) -> str:
+    """Formats one server-sent event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
@@ -1,13 +1,24 @@
 from fastapi import APIRouter, HTTPException, Request, Form, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict
+from typing import List, Dict, Optional
 from PIL import Image
 import torch
+import asyncio
 import base64
-import io
+import json
 import logging
+import os
 
 from api.utils.processor import Processor
+from api.utils.embedding_cache import image_keys
+from api.utils.response_cache import response_cache_key
+from api.utils.image_io import ImageTooLargeError, compute_image_hash, decode_image
+from api.utils.runtime import ExportedAnswerModel
+from api.utils.quantization import input_dtype
+from api.utils.streaming import DecodeStreamer, decode_tokens, end_token_seen, sse_event
+from api.utils.metrics import BATCH_SIZE, QUEUE_DEPTH, timed
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -15,6 +26,16 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Beam size used for explanation decoding alongside the answer head
+BEAM_SIZE = 3
+# /predict_stream decodes greedily: beam search only settles its sequence at the end, so
+# only greedy steps can be streamed as they are generated
+STREAM_BEAM_SIZE = 1
+
+# Batch endpoint limits: items per model forward and items per request
+BATCH_CHUNK_SIZE = int(os.getenv("VQA_BATCH_CHUNK_SIZE", "16"))
+MAX_BATCH_ITEMS = int(os.getenv("VQA_MAX_BATCH_ITEMS", "1024"))
+
 
 # Response models
 class PredictionItem(BaseModel):
@@ -30,53 +51,136 @@ class VQAResponse(BaseModel):
     device_used: str
 
 
-def predict_vqa(model, device, ckpt, image: Image.Image, question: str, top_k: int = 5) -> Dict:
+def format_candidates(topk_probs: List[float], topk_indices: List[int], top_k: int,
+                      idx2answer: Dict[int, str]) -> str:
+    """Formats the top-k answers as the candidate string returned to the agents."""
+    candidates_answer = ""
+    for i in range(top_k):
+        idx = topk_indices[i]
+        prob = topk_probs[i]
+        answer = idx2answer.get(idx, "Unknown")
+        candidates_answer += f"{answer} ({prob:.4f}) "
+    return candidates_answer
+
+
+def predict_vqa_batch(model, device, processor: Processor, idx2answer: Dict[int, str],
+                      images: List[Image.Image], questions: List[str], top_ks: List[int],
+                      image_hashes: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Batched VQA prediction function
+
+    Args:
+        model: The loaded VQA model, or an exported answer-path runtime
+        device: Computing device (CPU/GPU)
+        processor: Processor built from the checkpoint vocabulary
+        idx2answer: Mapping from answer index to answer string
+        images: List of PIL Image objects
+        questions: List of Vietnamese question strings, aligned with images
+        top_ks: Number of top predictions to return for each item
+        image_hashes: Content hashes of the images, used to reuse cached visual features
+
+    Returns:
+        List of dictionaries containing predictions and metadata, one per item
+    """
+    BATCH_SIZE.observe(len(images))
+    with timed("preprocess"):
+        image_tensor = processor.transform_images(images).to(device, dtype=input_dtype(model))
+    with timed("tokenize"):
+        question_tensor = processor.encode_questions(questions).to(device)
+
+    with torch.no_grad(), image_keys(image_hashes):
+        with timed("forward"):
+            if isinstance(model, ExportedAnswerModel):
+                answer_logits = model(image_tensor, question_tensor)
+            else:
+                answer_logits, _ = model.generate_explanation(
+                    image=image_tensor,
+                    question=question_tensor,
+                    beam_size=BEAM_SIZE
+                )
+        with timed("topk"):
+            probabilities = torch.nn.functional.softmax(answer_logits.float(), dim=-1)
+            topk_probs, topk_indices = torch.topk(probabilities, max(top_ks), dim=-1)
+            topk_probs, topk_indices = topk_probs.tolist(), topk_indices.tolist()
+            results = []
+            for row, (question, top_k) in enumerate(zip(questions, top_ks)):
+                results.append({
+                    "success": True,
+                    "question": question,
+                    "predictions": format_candidates(topk_probs[row], topk_indices[row], top_k, idx2answer),
+                    "device_used": str(device)
+                })
+    return results
+
+
+def predict_vqa(model, device, processor: Processor, idx2answer: Dict[int, str],
+                image: Image.Image, question: str, top_k: int = 5,
+                image_hash: Optional[str] = None) -> Dict:
     """
     Core VQA prediction function
     
     Args:
-        model: The loaded VQA model
+        model: The loaded VQA model, or an exported answer-path runtime
         device: Computing device (CPU/GPU)
+        processor: Processor built from the checkpoint vocabulary
+        idx2answer: Mapping from answer index to answer string
         image: PIL Image object
         question: Vietnamese question string
         top_k: Number of top predictions to return
+        image_hash: Content hash of the image, used to reuse cached visual features
     
     Returns:
         Dictionary containing predictions and metadata
     """
-    config = ckpt['config']
-    word2idx = ckpt['word2idx']
-    idx2answer = ckpt['idx2answer']
+    image_hashes = [image_hash] if image_hash is not None else None
+    return predict_vqa_batch(model, device, processor, idx2answer, [image], [question], [top_k], image_hashes)[0]
 
-    processor = Processor(
-        word2idx=word2idx,
-        max_question_length=config.get('max_question_length', 20)
-    )
 
-    inputs = processor(image, question)
-    image_tensor = inputs["image"].to(device)
-    question_tensor = inputs["question"].to(device)
+async def _predict_single(state, image_data: bytes, question: str, top_k: int) -> Dict:
+    """
+    Runs a single prediction off the event loop, going through the response cache when enabled.
+
+    Identical (image, question, top_k) requests share one cached or in-flight computation.
+    """
+    image_hash = compute_image_hash(image_data)
 
-    with torch.no_grad():
-        answer_logits, _ = model.generate_explanation(
-            image=image_tensor,
-            question=question_tensor,
-            beam_size=3
+    def compute() -> Dict:
+        with timed("image_decode"):
+            pil_image = decode_image(image_data, state.processor.image_size)
+        return predict_vqa(
+            state.answer_model,
+            state.device,
+            state.processor,
+            state.idx2answer,
+            pil_image,
+            question,
+            top_k,
+            image_hash
         )
-        probabilities = torch.nn.functional.softmax(answer_logits, dim=-1)[0]
-        topk_probs, topk_indices = torch.topk(probabilities, top_k)
-        candidates_answer = ""
-        for i in range(top_k):
-            idx = topk_indices[i].item()
-            prob = topk_probs[i].item()
-            answer = idx2answer.get(idx, "Unknown")
-            candidates_answer += f"{answer} ({prob:.4f}) "
-        return {
-            "success": True,
-            "question": question,
-            "predictions": candidates_answer,
-            "device_used": str(device)
-        }
+
+    async def run() -> Dict:
+        QUEUE_DEPTH.inc()
+        try:
+            return await run_in_threadpool(compute)
+        finally:
+            QUEUE_DEPTH.dec()
+
+    response_cache = getattr(state, 'response_cache', None)
+    if response_cache is None:
+        return await run()
+
+    result = await response_cache.get_or_compute(
+        response_cache_key(image_hash, question, top_k),
+        run
+    )
+    return {**result, "question": question}
+
+
+def _json_response(result: Dict) -> Response:
+    """Serializes a prediction result as a VQAResponse, timing the serialization stage."""
+    with timed("serialize"):
+        body = VQAResponse(**result).model_dump_json()
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/predict", response_model=VQAResponse)
@@ -99,24 +203,19 @@ async def predict_with_file(
     
     try:
         # Read and process image
-        image_data = await image.read()
-        pil_image = Image.open(io.BytesIO(image_data)).convert('RGB')
+        with timed("upload_read"):
+            image_data = await image.read()
         
         # Make prediction
-        result = predict_vqa(
-            request.app.state.model,
-            request.app.state.device,
-            request.app.state.ckpt,
-            pil_image,
-            question,
-            top_k
-        )
+        result = await _predict_single(request.app.state, image_data, question, top_k)
         
         if result["success"]:
-            return VQAResponse(**result)
+            return _json_response(result)
         else:
             raise HTTPException(status_code=500, detail=result["error"])
             
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"File upload endpoint error: {e}")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
@@ -142,34 +241,240 @@ async def predict_with_base64(
     
     try:
         # Decode base64 image
-        image_data = base64.b64decode(image_base64)
-        pil_image = Image.open(io.BytesIO(image_data)).convert('RGB')
+        with timed("base64_decode"):
+            image_data = base64.b64decode(image_base64)
         
         # Make prediction
-        result = predict_vqa(
-            request.app.state.model,
-            request.app.state.device,
-            request.app.state.ckpt,
-            pil_image,
-            question,
-            top_k
-        )
+        result = await _predict_single(request.app.state, image_data, question, top_k)
         
         if result["success"]:
-            return VQAResponse(**result)
+            return _json_response(result)
         else:
             raise HTTPException(status_code=500, detail=result["error"])
             
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Base64 endpoint error: {e}")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 
+@router.post("/predict_batch")
+async def predict_batch(
+    request: Request,
+    images: List[UploadFile] = File(..., description="Image files, one per item"),
+    questions: List[str] = Form(..., description="Vietnamese questions, aligned with images"),
+    top_k: Optional[List[int]] = Form(None, description="Top-k per item, or a single value for all items (1-10)")
+):
+    """
+    Predict VQA answers for many (image, question, top_k) items in one request.
+
+    Items are run through the model in chunks of VQA_BATCH_CHUNK_SIZE and results are
+    streamed back as NDJSON, one line per item, as soon as each chunk finishes.
+    """
+    # Validate inputs
+    if len(images) != len(questions):
+        raise HTTPException(status_code=400, detail="Number of images and questions must match")
+    if len(images) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+    if any(not question.strip() for question in questions):
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    top_ks = top_k or [5]
+    if len(top_ks) == 1:
+        top_ks = top_ks * len(images)
+    if len(top_ks) != len(images):
+        raise HTTPException(status_code=400, detail="top_k must be a single value or one value per item")
+    if any(k < 1 or k > 10 for k in top_ks):
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 10")
+
+    # Check if model is loaded
+    if not hasattr(request.app.state, 'model') or request.app.state.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    state = request.app.state
+
+    async def stream_results():
+        for start in range(0, len(images), BATCH_CHUNK_SIZE):
+            indices, pil_images, hashes = [], [], []
+            lines = {}
+            for index in range(start, min(start + BATCH_CHUNK_SIZE, len(images))):
+                try:
+                    with timed("upload_read"):
+                        image_data = await images[index].read()
+                    with timed("image_decode"):
+                        pil_images.append(await run_in_threadpool(decode_image, image_data, state.processor.image_size))
+                    hashes.append(compute_image_hash(image_data))
+                    indices.append(index)
+                except Exception as e:
+                    lines[index] = {"index": index, "success": False, "error": f"Image decode error: {str(e)}"}
+
+            if indices:
+                QUEUE_DEPTH.inc()
+                try:
+                    results = await run_in_threadpool(
+                        predict_vqa_batch,
+                        state.answer_model,
+                        state.device,
+                        state.processor,
+                        state.idx2answer,
+                        pil_images,
+                        [questions[i] for i in indices],
+                        [top_ks[i] for i in indices],
+                        hashes
+                    )
+                    for index, result in zip(indices, results):
+                        lines[index] = {"index": index, **result}
+                except Exception as e:
+                    logger.error(f"Batch endpoint error: {e}")
+                    for index in indices:
+                        lines[index] = {"index": index, "success": False, "error": f"Processing error: {str(e)}"}
+                finally:
+                    QUEUE_DEPTH.dec()
+
+            with timed("serialize"):
+                chunk = "".join(json.dumps(lines[index], ensure_ascii=False) + "\n" for index in sorted(lines))
+            yield chunk
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/predict_stream")
+async def predict_stream(
+    request: Request,
+    image: Optional[UploadFile] = File(None, description="Image file (jpg, png, etc.)"),
+    image_base64: Optional[str] = Form(None, description="Base64 encoded image, if no file is uploaded"),
+    question: str = Form(..., description="Vietnamese question about the image"),
+    top_k: int = Form(5, ge=1, le=10, description="Number of top predictions (1-10)")
+):
+    """
+    Predict VQA answer and stream the explanation as server-sent events.
+
+    Events, in order:
+    - answers: top-k candidates, sent as soon as the answer head finishes
+    - token: one explanation word per event, as greedy decoding proceeds
+    - explanation: the full decoded explanation
+
+    The answers match /predict. The explanation is decoded greedily (STREAM_BEAM_SIZE) and
+    can differ from the beam-search explanation of /predict for the same input.
+    - done (or error)
+    """
+    # Validate inputs
+    if not question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    if image is None and not image_base64:
+        raise HTTPException(status_code=400, detail="Either image or image_base64 is required")
+
+    # Check if model is loaded
+    if not hasattr(request.app.state, 'model') or request.app.state.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    state = request.app.state
+    if image is not None:
+        with timed("upload_read"):
+            image_data = await image.read()
+    try:
+        if image is None:
+            with timed("base64_decode"):
+                image_data = base64.b64decode(image_base64)
+        with timed("image_decode"):
+            pil_image = await run_in_threadpool(decode_image, image_data, state.processor.image_size)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Image decode error: {str(e)}")
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    idx2word = state.idx2word
+
+    def emit(event: str, payload: Dict):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+    def on_answer(logits: torch.Tensor):
+        probabilities = torch.nn.functional.softmax(logits.float(), dim=-1)
+        topk_probs, topk_indices = torch.topk(probabilities, top_k)
+        emit("answers", {
+            "question": question,
+            "predictions": format_candidates(topk_probs.tolist(), topk_indices.tolist(), top_k, state.idx2answer),
+            "device_used": str(state.device)
+        })
+
+    finished = False
+
+    def on_token(token_ids: List[int]):
+        nonlocal finished
+        if finished:
+            return
+        for word in decode_tokens(token_ids, idx2word):
+            emit("token", {"token": word})
+        finished = end_token_seen(token_ids, idx2word)
+
+    def generate():
+        inputs = state.processor(pil_image, question)
+        streamer = DecodeStreamer(*state.stream_modules, on_answer, on_token)
+        with torch.no_grad(), image_keys([compute_image_hash(image_data)]), streamer, timed("forward"):
+            _, explanations = state.model.generate_explanation(
+                image=inputs["image"].to(state.device, dtype=input_dtype(state.model)),
+                question=inputs["question"].to(state.device),
+                beam_size=STREAM_BEAM_SIZE
+            )
+        emit("explanation", {"explanation": " ".join(decode_tokens([int(idx) for idx in explanations[0]], idx2word))})
+
+    async def run():
+        QUEUE_DEPTH.inc()
+        try:
+            await run_in_threadpool(generate)
+            emit("done", {})
+        except Exception as e:
+            logger.error(f"Stream endpoint error: {e}")
+            emit("error", {"error": f"Processing error: {str(e)}"})
+        finally:
+            QUEUE_DEPTH.dec()
+
+    async def stream_events():
+        task = asyncio.create_task(run())
+        event_id = 0
+        try:
+            while True:
+                event, payload = await queue.get()
+                yield sse_event(event, json.dumps(payload, ensure_ascii=False), event_id)
+                event_id += 1
+                if event in ("done", "error"):
+                    break
+        finally:
+            await task
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/health")
 async def vqa_health_check(request: Request):
     """Check VQA model health"""
     return {
         "model_loaded": hasattr(request.app.state, 'model') and request.app.state.model is not None,
         "processor_loaded": hasattr(request.app.state, 'processor') and request.app.state.processor is not None,
-        "device": getattr(request.app.state, 'device', 'unknown')
+        "device": getattr(request.app.state, 'device', 'unknown'),
+        "backend": getattr(request.app.state, 'backend', 'unknown'),
+        "quantization": getattr(request.app.state, 'quantization', 'unknown'),
+        "embedding_cache": _cache_stats(request, 'embedding_cache'),
+        "response_cache": _cache_stats(request, 'response_cache')
+    }
+
+
+def _cache_stats(request: Request, name: str) -> Optional[Dict]:
+    cache = getattr(request.app.state, name, None)
+    return cache.stats() if cache is not None else None
+
+
+@router.get("/cache/stats")
+async def cache_stats(request: Request):
+    """Report hit rate and memory use of the API caches"""
+    return {
+        "embedding_cache": _cache_stats(request, 'embedding_cache'),
+        "response_cache": _cache_stats(request, 'response_cache')
     } 
\ No newline at end of file
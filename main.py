@@ -6,25 +6,48 @@ import logging
 from typing import Dict, Any, Union
 import torch
 from src.core.graph_builder.main_graph import MainGraphBuilder
-from src.tools.knowledge_tools import arxiv, wikipedia
+from src.tools.knowledge_tools import (
+    DENSE_DEVICE,
+    DENSE_INDEX_DIR,
+    DENSE_TOP_K,
+    arxiv,
+    build_dense_knowledge_tool,
+    wikipedia,
+)
 from src.tools.vqa_tool import vqa_tool, lm_knowledge, dam_caption_image_tool
 from src.utils.text_processing import normalize_answer
+from src.utils.rate_limiter import rate_limiter
+from src.utils.knowledge_cache import knowledge_cache
+from src.utils.tool_memo import ToolMemo
+from src.utils.deadline import Deadline
+from src.utils.prompt_utils import prefix_cache_stats
+from src.utils.llm_usage import LLMUsageTracker, summarize_usage
+from src.utils.reasoning_budget import REASONING_BUDGETS
+from src.models.llm_provider import get_batching_gateway, get_endpoint_pool, get_llm_cache
 from PIL import Image
 from tqdm import tqdm
 from src.evaluation.metrics_x import VQAXEvaluator
 
+# Per-sample latency budget in seconds (0 = unbounded); components that miss it are cut
+DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "0"))
+# Number of validation samples evaluated, always taken from the start of the set
+EVAL_NUM_SAMPLES = int(os.getenv("EVAL_NUM_SAMPLES", "300"))
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def setup_tools_registry() -> Dict[str, Any]:
-    return {
+    registry = {
         "vqa_tool": vqa_tool,
         "arxiv": arxiv,
         "wikipedia": wikipedia,
         "lm_knowledge": lm_knowledge,
         "analyze_image_object": dam_caption_image_tool,
     }
+    if DENSE_INDEX_DIR:
+        registry["dense_knowledge"] = build_dense_knowledge_tool(DENSE_INDEX_DIR, DENSE_TOP_K, DENSE_DEVICE)
+    return registry
 
 
 evaluator = VQAXEvaluator()
@@ -51,17 +74,36 @@ for item in data:
     samples.append(sample)
 
 # Limit samples for testing
-sampled = samples[:300]
+sampled = samples[:EVAL_NUM_SAMPLES]
 
 def run_visual_qa(question: str, image: Union[str, Image.Image], graph, sample_id: str = None):
     """
     Run visual QA with comprehensive error handling
     Returns tuple: (full_state, success_flag, error_message)
     """
+    tool_memo = ToolMemo()
+    usage_tracker = LLMUsageTracker()
+    configurable = {"tool_memo": tool_memo}
+    if DEADLINE_SECONDS > 0:
+        configurable["deadline"] = Deadline(DEADLINE_SECONDS)
     try:
         initial_state = {"question": question, "image": image}
         
-        result = graph.invoke(initial_state)
+        # Identical tool calls across analysts of this sample share one execution
+        config = {"configurable": configurable, "callbacks": [usage_tracker]}
+        # Analysts publish their answer on the custom stream before their generation finishes
+        start = time.perf_counter()
+        result, early_answers = None, {}
+        for namespace, mode, chunk in graph.stream(initial_state, config=config,
+                                                   stream_mode=["values", "custom"], subgraphs=True):
+            if mode == "custom" and "answer" in chunk:
+                early_answers[chunk["analyst"]] = {
+                    "answer": chunk["answer"],
+                    "seconds": time.perf_counter() - start
+                }
+                logger.debug(f"Early answer from {chunk['analyst']}: {chunk['answer']}")
+            elif mode == "values" and not namespace:
+                result = chunk
         caption = result['image_caption']
         evidences = result['evidences']
         answer = result["final_answer"]
@@ -72,7 +114,12 @@ def run_visual_qa(question: str, image: Union[str, Image.Image], graph, sample_i
             "image_caption": caption,
             "evidences": evidences,
             "final_answer": answer,
-            "explanation": explanation
+            "explanation": explanation,
+            "voting_details": result.get("voting_details", {}),
+            "early_answers": early_answers,
+            "llm_usage": usage_tracker.summary(),
+            "tool_memo": tool_memo.stats(),
+            "cut_components": result.get("cut_components", [])
         }
         return full_state, True, None
         
@@ -142,8 +189,23 @@ def main():
 
         # Detailed results
         full_state["gold_answer"] = gold_answer
+        full_state["latency_seconds"] = end_time - start_time
         detailed_results.append(full_state)
 
+    if get_endpoint_pool():
+        get_endpoint_pool().log_stats()
+    if get_batching_gateway():
+        logger.info(f"LLM batching: {get_batching_gateway().stats()}")
+    if get_llm_cache():
+        logger.info(f"LLM cache: {get_llm_cache().stats()}")
+    logger.info(f"Prefix cache: {prefix_cache_stats.stats()}")
+    llm_usage = summarize_usage([r["llm_usage"] for r in detailed_results if "llm_usage" in r])
+    logger.info(
+        f"LLM usage: {llm_usage['calls']} calls, {llm_usage['input_tokens']} prompt / "
+        f"{llm_usage['output_tokens']} completion tokens (~{llm_usage['think_tokens_est']} in <think>), "
+        f"{llm_usage['llm_seconds']:.1f}s, estimated cost {llm_usage['estimated_cost']:.4f}"
+    )
+
     # Print error summary
     print(f"\n--- Processing Summary ---")
     print(f"Total samples: {len(sampled)}")
@@ -195,6 +257,16 @@ def main():
         "failed_samples": len(error_samples),
         "error_details": error_samples,
         "metrics": metrics,
+        "tool_calls_deduplicated": sum(r.get("tool_memo", {}).get("deduplicated", 0) for r in detailed_results),
+        "rate_limits": rate_limiter.stats(),
+        "llm_endpoints": get_endpoint_pool().stats() if get_endpoint_pool() else {},
+        "llm_batching": get_batching_gateway().stats() if get_batching_gateway() else {},
+        "llm_cache": get_llm_cache().stats() if get_llm_cache() else {},
+        "prefix_cache": prefix_cache_stats.stats(),
+        "llm_usage": llm_usage,
+        "reasoning_budgets": REASONING_BUDGETS,
+        "mean_sample_seconds": sum(r["latency_seconds"] for r in detailed_results) / max(len(detailed_results), 1),
+        "knowledge_cache": knowledge_cache.stats(),
         "detailed_results": detailed_results
     }
 
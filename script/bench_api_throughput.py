@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import base64
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+
+
+def wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/", timeout=2).json().get("ready"):
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout}s")
+
+
+def run_load(base_url: str, image_base64: str, question: str, concurrency: int, total: int):
+    """Fires total requests with the given concurrency, returns (elapsed seconds, latencies)."""
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        response = requests.post(
+            f"{base_url}/vqa/predict_base64",
+            data={"image_base64": image_base64, "question": question, "top_k": 5},
+            timeout=120
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    return time.perf_counter() - start, latencies
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark prefork API throughput versus worker count (CPU only)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--threads-per-worker", type=int, default=1)
+    p.add_argument("--port", type=int, default=1240)
+    p.add_argument("--image", type=str, default=str(PROJ_ROOT / "ViVQA" / "demo" / "1.jpg"))
+    p.add_argument("--question", type=str, default="Trong ảnh có gì?")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--startup_timeout", type=float, default=300)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    image_base64 = base64.b64encode(Path(args.image).read_bytes()).decode("utf-8")
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    # Measure the model, not the caches
+    env = dict(os.environ, VQA_DEVICE="cpu", VQA_RESPONSE_CACHE_SIZE="0", VQA_EMBEDDING_CACHE_SIZE="0")
+
+    rows = []
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "api.serve",
+             "--host", "127.0.0.1", "--port", str(args.port),
+             "--workers", str(workers), "--threads-per-worker", str(args.threads_per_worker)],
+            cwd=PROJ_ROOT, env=env
+        )
+        try:
+            wait_until_ready(base_url, args.startup_timeout)
+            run_load(base_url, image_base64, args.question, args.concurrency, min(20, args.requests))
+            elapsed, latencies = run_load(base_url, image_base64, args.question, args.concurrency, args.requests)
+        finally:
+            server.terminate()
+            server.wait()
+
+        latencies_ms = np.array(latencies) * 1000
+        rows.append((workers, args.requests / elapsed,
+                     np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 95)))
+
+    print(f"\n{'workers':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for workers, throughput, p50, p95 in rows:
+        print(f"{workers:>8} {throughput:>10.2f} {p50:>10.1f} {p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from api
+sys.path.insert(0, str(PROJ_ROOT / "ViVQA-X" / "src"))
+
+from models.baseline_model.vivqax_model import ViVQAX_Model
+from api.utils.model_loader import load_model
+from api.utils.processor import Processor
+from api.utils.runtime import ExportedAnswerModel
+from api.vqa_router import BEAM_SIZE
+
+
+def time_calls(fn, repeats: int):
+    """Returns per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Compare eager vs exported answer-path latency and throughput on CPU")
+    p.add_argument("--artifact_dir", type=str, default=str(PROJ_ROOT / "checkpoints" / "vivqax"))
+    p.add_argument("--torchscript", type=str, default=None, help="Path to exported answer_path.pt")
+    p.add_argument("--onnx", type=str, default=None, help="Path to exported answer_path.onnx")
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--batch_size", type=int, default=16)
+    p.add_argument("--repeats", type=int, default=50)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    torch.set_num_threads(args.threads)
+
+    model, cfg, word2idx, _ = load_model(ViVQAX_Model, args.artifact_dir, device="cpu")
+    processor = Processor(word2idx=word2idx, max_question_length=cfg.get('max_question_length', 20))
+    image = Image.open(PROJ_ROOT / "ViVQA" / "demo" / "1.jpg").convert('RGB')
+    single = processor.batch([image], ["Con vật trong ảnh là gì?"])
+    batch = processor.batch([image] * args.batch_size, ["Con vật trong ảnh là gì?"] * args.batch_size)
+
+    def eager(inputs):
+        with torch.no_grad():
+            model.generate_explanation(image=inputs["image"], question=inputs["question"], beam_size=BEAM_SIZE)
+
+    backends = {"eager": eager}
+    if args.torchscript:
+        runtime_ts = ExportedAnswerModel(args.torchscript, "torchscript", args.threads)
+        backends["torchscript"] = lambda inputs: runtime_ts(inputs["image"], inputs["question"])
+    if args.onnx:
+        runtime_onnx = ExportedAnswerModel(args.onnx, "onnx", args.threads)
+        backends["onnx"] = lambda inputs: runtime_onnx(inputs["image"], inputs["question"])
+
+    print(f"{'backend':>12} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>10}")
+    for name, fn in backends.items():
+        for _ in range(3):
+            fn(single)
+        latencies = time_calls(lambda: fn(single), args.repeats)
+        batch_latencies = time_calls(lambda: fn(batch), max(1, args.repeats // 5))
+        throughput = args.batch_size / (batch_latencies.mean() / 1000)
+        print(f"{name:>12} {np.percentile(latencies, 50):>10.1f} {np.percentile(latencies, 95):>10.1f} {throughput:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
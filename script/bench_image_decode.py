@@ -0,0 +1,63 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from io import BytesIO
+
+from PIL import Image
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from api.utils
+
+from api.utils.image_io import decode_image
+from api.utils.processor import Processor
+
+
+def full_decode(image_data: bytes, target_size) -> Image.Image:
+    """Previous ingestion path: full-resolution decode, resize happens in the transform."""
+    return Image.open(BytesIO(image_data)).convert('RGB')
+
+
+def bench(decode_fn, payloads, processor: Processor, repeats: int) -> float:
+    """Returns mean decode+preprocess time per image in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image_data in payloads:
+            processor.transform(decode_fn(image_data, processor.image_size))
+    return (time.perf_counter() - start) * 1000 / (repeats * len(payloads))
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark API image decode + preprocess time")
+    p.add_argument("--image_dir", type=str, required=True,
+                   help="Directory of images (e.g., COCO val2014)")
+    p.add_argument("--limit", type=int, default=200, help="Number of images to load")
+    p.add_argument("--repeats", type=int, default=3)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    paths = sorted(p for p in Path(args.image_dir).iterdir()
+                   if p.suffix.lower() in {".jpg", ".jpeg", ".png"})[:args.limit]
+    if not paths:
+        raise SystemExit(f"No images found in {args.image_dir}")
+    payloads = [path.read_bytes() for path in paths]
+
+    processor = Processor(word2idx={'<PAD>': 0, '<UNK>': 1})
+
+    # Warm up both paths once
+    bench(full_decode, payloads[:5], processor, 1)
+    bench(decode_image, payloads[:5], processor, 1)
+
+    before = bench(full_decode, payloads, processor, args.repeats)
+    after = bench(decode_image, payloads, processor, args.repeats)
+
+    print(f"Images: {len(payloads)} x {args.repeats} repeats")
+    print(f"Full decode + preprocess:    {before:.2f} ms/image")
+    print(f"Reduced decode + preprocess: {after:.2f} ms/image")
+    print(f"Speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
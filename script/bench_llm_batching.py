@@ -0,0 +1,107 @@
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from pydantic import SecretStr
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from src.models
+
+from src.models.batching_gateway import BatchedChatModel, BatchingGateway
+
+
+def wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/models", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout}s")
+
+
+def run_load(llm, concurrency: int, total: int):
+    """Sends total chat requests with the given concurrency, returns (elapsed seconds, latencies)."""
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        llm.invoke([
+            SystemMessage(content="Bạn là một chuyên gia phân tích hình ảnh."),
+            HumanMessage(content=f"Câu hỏi {i}: Trong ảnh có gì?")
+        ])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    return time.perf_counter() - start, latencies
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Compare single chat completions with the LLM batching gateway")
+    p.add_argument("--base_url", type=str, default=None,
+                   help="OpenAI-compatible server; by default a local stub server is started")
+    p.add_argument("--model", type=str, default="Qwen/Qwen3-1.7B")
+    p.add_argument("--tokenizer", type=str, default=None,
+                   help="HuggingFace tokenizer for the chat template; plain ChatML when omitted (stub server)")
+    p.add_argument("--port", type=int, default=18234, help="Port of the stub server")
+    p.add_argument("--windows_ms", type=float, nargs="+", default=[5, 10, 20])
+    p.add_argument("--max_batch_size", type=int, default=32)
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--no_batch", action="store_true", help="Start the stub without batch support (fallback path)")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+        server = subprocess.Popen(
+            [sys.executable, str(PROJ_ROOT / "script" / "stub_llm_server.py"),
+             "--port", str(args.port), "--model", args.model] + (["--no_batch"] if args.no_batch else [])
+        )
+
+    tokenizer = None
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+
+    rows = []
+    try:
+        wait_until_ready(base_url, 30)
+        single = ChatOpenAI(base_url=base_url, api_key=SecretStr("stub"), model=args.model, temperature=0)
+        elapsed, latencies = run_load(single, args.concurrency, args.requests)
+        rows.append(("single", elapsed, latencies, None))
+
+        for window_ms in args.windows_ms:
+            gateway = BatchingGateway(base_url, args.model, window_ms=window_ms, max_batch_size=args.max_batch_size)
+            llm = BatchedChatModel(gateway=gateway, fallback=single, tokenizer=tokenizer)
+            elapsed, latencies = run_load(llm, args.concurrency, args.requests)
+            rows.append((f"batch {window_ms:g}ms", elapsed, latencies, gateway.stats()))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'mode':>14} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'mean batch':>11} {'fallbacks':>10}")
+    for mode, elapsed, latencies, stats in rows:
+        latencies_ms = np.array(latencies) * 1000
+        mean_batch = f"{stats['mean_batch_size']:.1f}" if stats and stats["mean_batch_size"] else "-"
+        fallbacks = stats["fallbacks"] if stats else "-"
+        print(f"{mode:>14} {args.requests / elapsed:>10.2f} {np.percentile(latencies_ms, 50):>10.1f} "
+              f"{np.percentile(latencies_ms, 95):>10.1f} {mean_batch:>11} {fallbacks:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from src.utils
+
+from src.utils.reasoning_budget import REASONING_NODES, parse_budget
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Evaluate a fixed ViVQA-X slice once per reasoning budget and compare latency and accuracy"
+    )
+    p.add_argument("--budgets", type=str, nargs="+", default=["unlimited", "off", "512", "256"],
+                   help="'off', 'unlimited' or a token cap; each value is one evaluation run")
+    p.add_argument("--nodes", type=str, nargs="+", default=["final_reasoning", "consensus_judge"],
+                   choices=REASONING_NODES, help="Nodes the budget applies to; the others stay unlimited")
+    p.add_argument("--num_samples", type=int, default=50)
+    p.add_argument("--out", type=str, default="reasoning_budget_results.json")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    for budget in args.budgets:
+        parse_budget(budget) # Fail before the first run on a bad value
+
+    rows = []
+    for budget in args.budgets:
+        env = dict(os.environ, EVAL_NUM_SAMPLES=str(args.num_samples))
+        for node in REASONING_NODES:
+            env[f"REASONING_BUDGET_{node.upper()}"] = budget if node in args.nodes else "unlimited"
+        print(f"\n=== Reasoning budget {budget} on {', '.join(args.nodes)} ===")
+        subprocess.run([sys.executable, "main.py"], cwd=PROJ_ROOT, env=env, check=True)
+
+        results_path = PROJ_ROOT / f"evaluation_results_0_to_{args.num_samples}_samples.json"
+        with open(results_path, encoding="utf-8") as f:
+            results = json.load(f)
+        usage = results["llm_usage"]
+        components = {
+            name: stats for name, stats in usage["by_component"].items()
+            if name.split(".")[-1] in args.nodes
+        }
+        rows.append({
+            "budget": budget,
+            "answer_accuracy": results["metrics"].get("answer_accuracy"),
+            "metrics": results["metrics"],
+            "mean_sample_seconds": results["mean_sample_seconds"],
+            "mean_tokens_per_sample": usage["mean_tokens_per_sample"],
+            "think_tokens_est": usage["think_tokens_est"],
+            "components": components
+        })
+
+    with open(PROJ_ROOT / args.out, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'budget':>10} {'accuracy':>9} {'s/sample':>9} {'tok/sample':>11} {'think tok':>10}  p50 latency per node")
+    for row in rows:
+        accuracy = f"{row['answer_accuracy']:.4f}" if row["answer_accuracy"] is not None else "-"
+        node_latency = ", ".join(
+            f"{name} {stats['latency_seconds']['p50']:.2f}s"
+            for name, stats in row["components"].items() if stats["latency_seconds"]["p50"] is not None
+        )
+        print(f"{row['budget']:>10} {accuracy:>9} {row['mean_sample_seconds']:>9.2f} "
+              f"{row['mean_tokens_per_sample']:>11.0f} {row['think_tokens_est']:>10}  {node_latency}")
+    print(f"\nSaved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from src.retrieval
+
+from src.retrieval.dense_index import VECTOR_DTYPES, TextEncoder, write_dense_index
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Build the dense passage index used by the dense_knowledge tool (DENSE_INDEX_DIR)"
+    )
+    p.add_argument("--input", type=str, nargs="+", required=True,
+                   help="JSONL files with one page per line ({'title', 'text'}), e.g. WikiExtractor --json output")
+    p.add_argument("--out_dir", type=str, default=str(PROJ_ROOT / "indexes" / "dense"))
+    p.add_argument("--model_name", type=str, default="intfloat/multilingual-e5-small",
+                   help="HuggingFace encoder; must cover Vietnamese")
+    p.add_argument("--query_prefix", type=str, default="query: ")
+    p.add_argument("--passage_prefix", type=str, default="passage: ")
+    p.add_argument("--dtype", type=str, default="float16", choices=VECTOR_DTYPES)
+    p.add_argument("--passage_words", type=int, default=100, help="Words per passage")
+    p.add_argument("--max_passages_per_page", type=int, default=3)
+    p.add_argument("--batch_size", type=int, default=128)
+    p.add_argument("--device", type=str, default=None)
+    p.add_argument("--limit", type=int, default=None, help="Maximum pages per input file")
+    return p.parse_args()
+
+
+def split_passages(text: str, passage_words: int, max_passages: int):
+    words = text.split()
+    return [" ".join(words[i:i + passage_words])
+            for i in range(0, len(words), passage_words)][:max_passages]
+
+
+def main():
+    args = parse_args()
+
+    passages = []
+    for path in args.input:
+        pages = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                page = json.loads(line)
+                title = page.get("title", "")
+                for passage in split_passages(page.get("text", ""), args.passage_words, args.max_passages_per_page):
+                    passages.append((title, passage))
+                pages += 1
+                if args.limit and pages >= args.limit:
+                    break
+        print(f"Read {pages} pages from {path}")
+
+    encoder = TextEncoder(args.model_name, args.device)
+    vectors = encoder.encode(
+        [f"{args.passage_prefix}{title}. {text}" for title, text in passages],
+        batch_size=args.batch_size
+    )
+    write_dense_index(
+        args.out_dir, vectors, passages, args.model_name, args.dtype,
+        query_prefix=args.query_prefix, passage_prefix=args.passage_prefix
+    )
+    print(f"Saved {len(passages)} passages to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from src.retrieval
+
+from src.retrieval.bm25_index import BM25IndexBuilder
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Build the local BM25 Wikipedia index used when WIKIPEDIA_BACKEND=local"
+    )
+    p.add_argument("--input", type=str, nargs="+", required=True,
+                   help="WikiExtractor --json output files (one JSON page per line), e.g. viwiki and enwiki")
+    p.add_argument("--out_dir", type=str, default=str(PROJ_ROOT / "indexes" / "wikipedia"),
+                   help="Output directory (same as WIKIPEDIA_INDEX_DIR used by the tool)")
+    p.add_argument("--summary_chars", type=int, default=1000,
+                   help="Characters of the lead section stored and returned as the summary")
+    p.add_argument("--index_chars", type=int, default=4000,
+                   help="Characters of article text indexed beyond the summary length")
+    p.add_argument("--limit", type=int, default=None, help="Maximum pages per input file")
+    return p.parse_args()
+
+
+def lead_section(title: str, text: str, max_chars: int) -> str:
+    """First paragraphs of the article, skipping a repeated title line."""
+    paragraphs = [p.strip() for p in text.split("\n") if p.strip() and p.strip() != title]
+    summary = ""
+    for paragraph in paragraphs:
+        if summary and len(summary) + len(paragraph) > max_chars:
+            break
+        summary = f"{summary} {paragraph}".strip()
+    return summary[:max_chars]
+
+
+def main():
+    args = parse_args()
+    builder = BM25IndexBuilder()
+
+    for path in args.input:
+        pages = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                page = json.loads(line)
+                title, text = page.get("title", ""), page.get("text", "")
+                summary = lead_section(title, text, args.summary_chars)
+                if not summary:
+                    continue
+                builder.add(title, summary, text[:args.summary_chars + args.index_chars])
+                pages += 1
+                if args.limit and pages >= args.limit:
+                    break
+        print(f"Indexed {pages} pages from {path}")
+
+    builder.write(args.out_dir)
+    print(f"Saved index to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import sys
+import argparse
+from pathlib import Path
+
+from huggingface_hub import hf_hub_download
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from api.utils.model_loader
+
+from api.utils.model_loader import convert_checkpoint
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Convert best_model.pth into model.safetensors + vivqax_meta.json for fast API startup"
+    )
+    # Checkpoint: local or HF
+    p.add_argument("--checkpoint", type=str, default=None,
+                   help="Path to local best_model.pth")
+    p.add_argument("--hf_repo", type=str, default="VLAI-AIVN/ViVQA-X_LSTM-Generative",
+                   help="HuggingFace repo id if --checkpoint not provided")
+    p.add_argument("--hf_filename", type=str, default="best_model.pth",
+                   help="HuggingFace filename if --checkpoint not provided")
+    p.add_argument("--out_dir", type=str, default=str(PROJ_ROOT / "checkpoints" / "vivqax"),
+                   help="Output directory (same as VQA_ARTIFACT_DIR used by the API)")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    ckpt_path = args.checkpoint or hf_hub_download(
+        repo_id=args.hf_repo,
+        filename=args.hf_filename
+    )
+    convert_checkpoint(ckpt_path, args.out_dir)
+    print(f"Saved converted checkpoint to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
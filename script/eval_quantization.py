@@ -0,0 +1,109 @@
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from api.utils and src.evaluation.metrics_x
+sys.path.insert(0, str(PROJ_ROOT / "ViVQA-X" / "src"))
+
+from models.baseline_model.vivqax_model import ViVQAX_Model
+from api.utils.image_io import decode_image
+from api.utils.model_loader import load_model
+from api.utils.processor import Processor
+from api.utils.quantization import QUANTIZATION_MODES, input_dtype, model_size_mb, quantize_model
+from api.vqa_router import BEAM_SIZE
+from src.evaluation.metrics_x import VQAXEvaluator
+
+
+def load_slice(json_path: str, image_dir: str, limit: int, seed: int):
+    """Loads a fixed held-out slice of (image bytes, question, answer) from a ViVQA-X split."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    random.seed(seed)
+    data = random.sample(data, k=min(limit, len(data)))
+    return [
+        ((Path(image_dir) / item["image_name"]).read_bytes(), item["question"], str(item["answer"]).lower())
+        for item in data
+    ]
+
+
+def run_mode(mode: str, artifact_dir: str, samples, answer2idx):
+    model, cfg, word2idx, _ = load_model(ViVQAX_Model, artifact_dir, device="cpu")
+    model = quantize_model(model, mode)
+    processor = Processor(word2idx=word2idx, max_question_length=cfg.get('max_question_length', 20))
+    dtype = input_dtype(model)
+
+    predictions, ground_truths, latencies = [], [], []
+    with torch.no_grad():
+        for image_data, question, answer in samples:
+            start = time.perf_counter()
+            inputs = processor(decode_image(image_data, processor.image_size), question)
+            answer_logits, _ = model.generate_explanation(
+                image=inputs["image"].to(dtype=dtype),
+                question=inputs["question"],
+                beam_size=BEAM_SIZE
+            )
+            predictions.append(answer_logits.float().argmax(dim=-1).item())
+            latencies.append((time.perf_counter() - start) * 1000)
+            ground_truths.append(answer2idx.get(answer, -1))
+
+    # Reuse the evaluator's answer metric without loading its explanation scorers
+    metrics = VQAXEvaluator.compute_answer_metrics(predictions, ground_truths)
+    latencies = np.array(latencies[1:] or latencies)
+    return {
+        "answer_accuracy": metrics["answer_accuracy"],
+        "answer_f1_score": metrics["answer_f1_score"],
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "model_size_mb": model_size_mb(model)
+    }
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Accuracy delta and latency of quantized serving modes")
+    p.add_argument("--artifact_dir", type=str, default=str(PROJ_ROOT / "checkpoints" / "vivqax"))
+    p.add_argument("--json_path", type=str, required=True,
+                   help="Path to ViVQA-X split JSON (e.g., ViVQA-X_val.json)")
+    p.add_argument("--image_dir", type=str, required=True,
+                   help="Image directory for the split (e.g., COCO val2014)")
+    p.add_argument("--modes", type=str, nargs="+", default=list(QUANTIZATION_MODES), choices=QUANTIZATION_MODES)
+    p.add_argument("--limit", type=int, default=500, help="Size of the held-out slice")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--out", type=str, default=None, help="Output report JSON path")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    torch.set_num_threads(args.threads)
+
+    samples = load_slice(args.json_path, args.image_dir, args.limit, args.seed)
+    _, _, _, idx2answer = load_model(ViVQAX_Model, args.artifact_dir, device="cpu")
+    answer2idx = {answer: idx for idx, answer in idx2answer.items()}
+
+    report = {mode: run_mode(mode, args.artifact_dir, samples, answer2idx) for mode in args.modes}
+    baseline = report.get("none")
+
+    print(f"\n{'mode':>6} {'acc':>8} {'Δacc':>8} {'p50 ms':>9} {'p95 ms':>9} {'size MB':>9}")
+    for mode, result in report.items():
+        if baseline:
+            result["accuracy_delta"] = result["answer_accuracy"] - baseline["answer_accuracy"]
+        delta = f"{result['accuracy_delta']:+.4f}" if baseline else "n/a"
+        print(f"{mode:>6} {result['answer_accuracy']:>8.4f} {delta:>8} "
+              f"{result['latency_p50_ms']:>9.1f} {result['latency_p95_ms']:>9.1f} {result['model_size_mb']:>9.1f}")
+
+    out_file = args.out or f"quantization_report_{Path(args.json_path).stem}_{len(samples)}.json"
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump({"num_samples": len(samples), "seed": args.seed, "results": report}, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved report to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import argparse
+from pathlib import Path
+
+import torch
+from PIL import Image
+
+PROJ_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJ_ROOT)) # For import from api.utils
+sys.path.insert(0, str(PROJ_ROOT / "ViVQA-X" / "src"))
+
+from models.baseline_model.vivqax_model import ViVQAX_Model
+from api.utils.model_loader import load_model
+from api.utils.processor import Processor
+from api.utils.runtime import ExportedAnswerModel, export_answer_path
+
+DEMO_INPUTS = [
+    (PROJ_ROOT / "ViVQA" / "demo" / "1.jpg", "Con vật trong ảnh là gì?"),
+    (PROJ_ROOT / "ViVQA" / "demo" / "2.jpg", "Có bao nhiêu người trong ảnh?"),
+]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Export the VQA answer path to TorchScript or ONNX with a parity check")
+    p.add_argument("--artifact_dir", type=str, default=str(PROJ_ROOT / "checkpoints" / "vivqax"),
+                   help="Directory with model.safetensors + vivqax_meta.json (see convert_checkpoint_vivqax.py)")
+    p.add_argument("--format", type=str, choices=["torchscript", "onnx"], default="onnx")
+    p.add_argument("--out", type=str, default=None, help="Output path (default: <artifact_dir>/answer_path.<ext>)")
+    p.add_argument("--atol", type=float, default=1e-3, help="Max allowed abs difference of answer probabilities")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    out = args.out or str(Path(args.artifact_dir) / ("answer_path.onnx" if args.format == "onnx" else "answer_path.pt"))
+
+    model, cfg, word2idx, idx2answer = load_model(ViVQAX_Model, args.artifact_dir, device="cpu")
+    processor = Processor(word2idx=word2idx, max_question_length=cfg.get('max_question_length', 20))
+
+    images = [Image.open(path).convert('RGB') for path, _ in DEMO_INPUTS]
+    questions = [question for _, question in DEMO_INPUTS]
+    inputs = processor.batch(images, questions)
+
+    export_answer_path(model, inputs["image"][:1], inputs["question"][:1], out, args.format)
+
+    # Parity check against the eager path served by the API
+    with torch.no_grad():
+        eager_logits, _ = model.generate_explanation(image=inputs["image"], question=inputs["question"], beam_size=3)
+    exported_logits = ExportedAnswerModel(out, args.format)(inputs["image"], inputs["question"])
+
+    eager_probs = torch.softmax(eager_logits.float(), dim=-1)
+    exported_probs = torch.softmax(exported_logits.float(), dim=-1)
+    max_diff = (eager_probs - exported_probs).abs().max().item()
+    top1_match = (eager_probs.argmax(-1) == exported_probs.argmax(-1)).float().mean().item()
+
+    print(f"Exported {args.format} answer path to {out}")
+    print(f"Parity: max |Δprob| = {max_diff:.2e}, top-1 agreement = {top1_match:.2%}")
+    if max_diff > args.atol or top1_match < 1.0:
+        raise SystemExit("Parity check failed: exported answer path does not match eager model")
+
+
+if __name__ == "__main__":
+    main()
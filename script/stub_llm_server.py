@@ -0,0 +1,130 @@
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Stub OpenAI-compatible LLM server for exercising the LLM client, pool and batching gateway"
+    )
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=1234)
+    p.add_argument("--model", type=str, default="Qwen/Qwen3-1.7B")
+    p.add_argument("--max_model_len", type=int, default=4096)
+    p.add_argument("--request_ms", type=float, default=50.0,
+                   help="Fixed cost of every request, paid once per multi-prompt batch")
+    p.add_argument("--prompt_ms", type=float, default=5.0, help="Additional cost per prompt")
+    p.add_argument("--reply", type=str, default="Answer: stub\nEvidence: stub reply")
+    p.add_argument("--no_batch", action="store_true",
+                   help="Reject multi-prompt completions like a server without batch support")
+    return p.parse_args()
+
+
+def make_handler(args):
+    # Requests are served one at a time, like a single engine stepping a batch
+    engine = threading.Lock()
+    counts = {"requests": 0, "prompts": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_):
+            pass
+
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _serve(self, num_prompts: int):
+            with engine:
+                counts["requests"] += 1
+                counts["prompts"] += num_prompts
+                time.sleep((args.request_ms + args.prompt_ms * num_prompts) / 1000.0)
+
+        def _generate(self, body: dict):
+            """Returns (reply, finish reason), cut to max_tokens words like a length-limited generation."""
+            words = args.reply.split(" ")
+            max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+            if max_tokens and len(words) > max_tokens:
+                return " ".join(words[:max_tokens]), "length"
+            return args.reply, "stop"
+
+        def _stream_chat(self, body: dict, usage: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": body.get("model", args.model)}
+            reply, finish_reason = self._generate(body)
+            for i, word in enumerate(reply.split(" ")):
+                delta = {"role": "assistant"} if i == 0 else {}
+                delta["content"] = word if i == 0 else " " + word
+                chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._reply(200, {"object": "list", "data": [
+                    {"id": args.model, "object": "model", "max_model_len": args.max_model_len}
+                ]})
+            elif self.path.rstrip("/").endswith("/stats"):
+                self._reply(200, counts)
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            completion_tokens = len(args.reply.split())
+            usage = {"prompt_tokens": 1, "completion_tokens": completion_tokens, "total_tokens": 1 + completion_tokens}
+
+            if self.path.endswith("/completions") and not self.path.endswith("/chat/completions"):
+                prompts = body.get("prompt", "")
+                prompts = prompts if isinstance(prompts, list) else [prompts]
+                if args.no_batch and len(prompts) > 1:
+                    self._reply(400, {"error": "prompt must be a string"})
+                    return
+                self._serve(len(prompts))
+                self._reply(200, {
+                    "id": "cmpl-stub", "object": "text_completion", "created": int(time.time()),
+                    "model": body.get("model", args.model),
+                    "choices": [{"index": i, "text": reply, "finish_reason": finish_reason}
+                                for i, (reply, finish_reason) in enumerate([self._generate(body)] * len(prompts))],
+                    "usage": usage
+                })
+            elif self.path.endswith("/chat/completions") and body.get("stream"):
+                self._serve(1)
+                self._stream_chat(body, usage)
+            elif self.path.endswith("/chat/completions"):
+                self._serve(1)
+                reply, finish_reason = self._generate(body)
+                self._reply(200, {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", args.model),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": reply},
+                                 "finish_reason": finish_reason}],
+                    "usage": usage
+                })
+            else:
+                self._reply(404, {"error": "not found"})
+
+    return Handler
+
+
+def main():
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Stub LLM server on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
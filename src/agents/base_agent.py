@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List
 from pydantic import BaseModel, Field
 
 
@@ -9,6 +9,11 @@ class Analyst(BaseModel):
     tools: List[str]
     system_prompt: str = Field(description="System prompt for the analyst.")
     final_system_prompt: str = Field(default="", description="Final system prompt for reasoning.")
+    tool_plan: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Tool calls run before the first planning step, as {'name', 'args'}; string args may use {question} and {context}."
+    )
+    plan_only: bool = Field(default=False, description="Go to final reasoning right after the tool plan, without a planning LLM call.")
     
     @property
     def affiliation(self) -> str:
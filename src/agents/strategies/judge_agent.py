@@ -2,6 +2,9 @@ from bert_score import score as bert_score
 from typing import List, Dict
 from src.models.llm_provider import get_llm
 from src.utils.text_processing import extract_explanation
+from src.utils.prompt_utils import compile_prompt, prefix_cache_stats
+from src.utils.llm_usage import llm_call_config
+from src.utils.reasoning_budget import invoke_with_budget
 
 
 class ConsensusJudgeAgent():
@@ -39,6 +42,7 @@ class ConsensusJudgeAgent():
             Explanation:
         """
 
+        self.prompt = compile_prompt(self.system_prompt)
         self.sim_threshold = sim_threshold
         self.min_pairs = min_pairs
         self.lang = "vi"
@@ -52,7 +56,9 @@ class ConsensusJudgeAgent():
         senior_result = agent_results.get("Senior", "")
         manager_result = agent_results.get("Manager", "")
         thinkings = [junior_result, senior_result, manager_result]
-        sim_ok = self._is_consistent(thinkings)
+        # Analysts dropped by the request deadline have no entry and are left out of the check
+        present = [agent_results[name] for name in ("Junior", "Senior", "Manager") if name in agent_results]
+        sim_ok = self._is_consistent(present)
 
         if sim_ok:
             explanation = self._aggregate_explanation(question, answer, thinkings)
@@ -64,6 +70,8 @@ class ConsensusJudgeAgent():
         """
         Trả về True nếu có ít nhất min_pairs cặp thinking có BERTScore F1 >= threshold
         """
+        if len(thinkings) < 2:
+            return len(thinkings) == 1
         refs, cands = [], []
         for i in range(len(thinkings)):
             for j in range(i + 1, len(thinkings)):
@@ -74,7 +82,7 @@ class ConsensusJudgeAgent():
         ok_flags = [f.item() >= self.sim_threshold for f in F1]
         ok_count  = sum(ok_flags)
 
-        return ok_count >= self.min_pairs
+        return ok_count >= min(self.min_pairs, len(ok_flags))
 
     def _aggregate_explanation(self, question: str, answer: str, thinkings: List[str]) -> str:
         llm = get_llm(temperature=0.1)
@@ -85,8 +93,11 @@ class ConsensusJudgeAgent():
             "evidence_2": thinkings[1],
             "evidence_3": thinkings[2]
         }
-        system_prompt = self.system_prompt.format(**format_dict)
-        response = llm.invoke(system_prompt)
+        response = invoke_with_budget(
+            llm, self.prompt.messages(format_dict), "consensus_judge",
+            llm_call_config(None, "Judge", "consensus_judge")
+        )
+        prefix_cache_stats.record(response)
         explanation = extract_explanation(response.content)
         return explanation
 
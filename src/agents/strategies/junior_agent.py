@@ -7,6 +7,9 @@ class JuniorAgent(Analyst):
             name="Junior",
             description="A junior analyst who uses only the vanilla VQA model to generate candidate answers.",
             tools=["vqa_tool"],
+            # The only step is known in advance, so no planning LLM call is needed
+            tool_plan=[{"name": "vqa_tool", "args": {"question": "{question}"}}],
+            plan_only=True,
             system_prompt="""
                 You are a helpful and intelligent assistant. Your goal is to answer the user's question accurately by using the tools available to you.
 
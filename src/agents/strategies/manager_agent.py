@@ -8,19 +8,22 @@ class ManagerAgent(Analyst):
         super().__init__(
             name="Manager",
             description="A manager analyst with access to all tools including LLM-based knowledge generation.",
-            tools=["vqa_tool", "wikipedia", "analyze_image_object"],
+            tools=["vqa_tool", "wikipedia", "analyze_image_object", "dense_knowledge"],
+            # Visual evidence is always gathered first; the planning LLM picks the remaining tools
+            tool_plan=[{"name": "vqa_tool", "args": {"question": "{question}"}}],
             system_prompt = """
                 You are a helpful and intelligent assistant. Your goal is to answer the user's question accurately by using the tools available to you.
 
                 **Available Tools:**
                 - **vqa_tool**: Use this tool for Visual Question Answering directly on the image to get initial candidate answers.
                 - **wikipedia**: Use this tool to retrieve factual, encyclopedic knowledge from external sources relevant to the question.
+                - **dense_knowledge**: Use this tool to retrieve background passages semantically related to the question. It works well for Vietnamese questions where `wikipedia` keyword lookups find nothing. Only use it if it is among the tools you can call.
                 - **analyze_image_object**: Use this tool to get a detailed, knowledge-rich description of a *specific object* in the image.
 
                 **Information Gathering Policy:**
                 To ensure a high-quality and well-supported answer, you **must** gather the following three types of information before using the "Finish" action.
                 1.  **Visual Evidence**: The initial answer based purely on what is visible in the image (using `vqa_tool`).
-                2.  **Factual Knowledge**: Relevant encyclopedic information about the entities in the question (using `wikipedia`).
+                2.  **Factual Knowledge**: Relevant encyclopedic information about the entities in the question (using `wikipedia`, or `dense_knowledge` when it is available).
                 3.  **Object-Specific Details**: A detailed analysis of the main object of interest (using `analyze_image_object`).
 
                 **Instructions:**
@@ -9,18 +9,21 @@ class SeniorAgent(Analyst):
         super().__init__(
             name="Senior",
             description="A senior analyst who uses both the VQA model and KBs retrieval to enhance answers.",
-            tools=["vqa_tool", "wikipedia"],
+            tools=["vqa_tool", "wikipedia", "dense_knowledge"],
+            # Visual evidence is always gathered first; the planning LLM picks the remaining tools
+            tool_plan=[{"name": "vqa_tool", "args": {"question": "{question}"}}],
             system_prompt="""
                 You are a helpful and intelligent assistant. Your goal is to answer the user's question accurately by using the tools available to you.
 
                 **Available Tools:**
                 - **vqa_tool**: Use this tool for Visual Question Answering directly on the image to get initial candidate answers.
                 - **wikipedia**: Use this tool to retrieve factual, encyclopedic knowledge from external sources relevant to the question.
+                - **dense_knowledge**: Use this tool to retrieve background passages semantically related to the question. It works well for Vietnamese questions where `wikipedia` keyword lookups find nothing. Only use it if it is among the tools you can call.
 
                 **Information Gathering Policy:**
                 To ensure a high-quality and well-supported answer, you **must** gather the following two types of information before using the "Finish" action.
                 1.  **Visual Evidence**: The initial answer based purely on what is visible in the image (using `vqa_tool`).
-                2.  **Factual Knowledge**: Relevant encyclopedic information about the entities in the question (using `wikipedia`).
+                2.  **Factual Knowledge**: Relevant encyclopedic information about the entities in the question (using `wikipedia`, or `dense_knowledge` when it is available).
 
                 **Instructions:**
                 1.  Create a step-by-step plan to gather the two types of information listed in the Policy.
@@ -1,7 +1,8 @@
+import os
 from typing import Dict, Any, Type
 from langgraph.graph import StateGraph, END, START
 
-from src.core.nodes.subgraph_node import tool_node, call_agent_node, final_reasoning_node, should_continue
+from src.core.nodes.subgraph_node import tool_node, call_agent_node, final_reasoning_node, plan_node, should_continue
 from src.core.state import (    
     ViReJuniorState, 
     ViReSeniorState, 
@@ -14,6 +15,9 @@ from src.agents.strategies.junior_agent import JuniorAgent
 from src.agents.strategies.senior_agent import SeniorAgent
 from src.agents.strategies.manager_agent import ManagerAgent
 
+# Run the analysts' static tool plans; set to 0 to let the planning LLM choose every step
+TOOL_PLANS_ENABLED = os.getenv("AGENT_TOOL_PLANS", "1") == "1"
+
 class SubGraphBuilder:
     """Builder for individual agent subgraphs"""
     
@@ -23,24 +27,44 @@ class SubGraphBuilder:
     def create_agent_subgraph(self, state_class: Type, analyst_instance, output_state) -> StateGraph:
         """Create a subgraph for a specific agent type with analyst instance"""
         workflow = StateGraph(state_class, output=output_state)
+        has_plan = TOOL_PLANS_ENABLED and bool(analyst_instance.tool_plan)
+        
+        def planned_tools_node(state, config):
+            state["analyst"] = analyst_instance
+            return plan_node(state, config)
         
         def agent_node(state, config):
             state["analyst"] = analyst_instance 
             return call_agent_node(state, config, self.tools_registry)
         
-        def tools_node(state):
-            return tool_node(state, self.tools_registry)
+        def tools_node(state, config):
+            return tool_node(state, self.tools_registry, config)
         
-        def final_reasoning_with_analyst(state):
-            return final_reasoning_node(state)
+        def final_reasoning_with_analyst(state, config):
+            return final_reasoning_node(state, config)
         
         # Add nodes
-        workflow.add_node("agent", agent_node)
         workflow.add_node("tools", tools_node)
         workflow.add_node("final_reasoning", final_reasoning_with_analyst)
+        workflow.add_edge("final_reasoning", END)
         
-        # Set entry point
-        workflow.set_entry_point("agent")
+        # A plan-only analyst runs its fixed tool calls and goes straight to final reasoning
+        if has_plan and analyst_instance.plan_only:
+            workflow.add_node("plan", planned_tools_node)
+            workflow.set_entry_point("plan")
+            workflow.add_edge("plan", "tools")
+            workflow.add_edge("tools", "final_reasoning")
+            return workflow
+        
+        workflow.add_node("agent", agent_node)
+        
+        # Set entry point; a fixed first step runs before the planning LLM is called
+        if has_plan:
+            workflow.add_node("plan", planned_tools_node)
+            workflow.set_entry_point("plan")
+            workflow.add_edge("plan", "tools")
+        else:
+            workflow.set_entry_point("agent")
         
         # Add conditional edges
         workflow.add_conditional_edges("agent", should_continue, {
@@ -50,7 +74,6 @@ class SubGraphBuilder:
         
         # Add edges
         workflow.add_edge("tools", "agent")
-        workflow.add_edge("final_reasoning", END)
         
         return workflow
     
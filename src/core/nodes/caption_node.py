@@ -1,6 +1,13 @@
 from src.tools.dam_tools import dam_caption_image
+from src.utils.deadline import DeadlineExceeded, get_deadline, run_with_deadline
 
 
-def caption_node(state):
-        caption = dam_caption_image(state.get("image"))
+def caption_node(state, config=None):
+        deadline = get_deadline(config)
+        try:
+            caption = run_with_deadline(deadline, dam_caption_image, state.get("image"))
+        except DeadlineExceeded:
+            # Analysts can still work from the question and tools without a caption
+            deadline.cut("caption")
+            caption = ""
         return {"image_caption": caption, "phase": "prevote"}
\ No newline at end of file
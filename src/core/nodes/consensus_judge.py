@@ -1,12 +1,43 @@
+import os
 from src.agents.strategies.judge_agent import ConsensusJudgeAgent
-from typing import Dict
+from src.utils.deadline import DeadlineExceeded, get_deadline, run_with_deadline
+from typing import Any, Dict
+
+# Skip the judge (BERTScore + explanation LLM call) when less than this much budget is left
+JUDGE_MIN_SECONDS = float(os.getenv("AGENT_JUDGE_MIN_SECONDS", "15"))
+
+
+def _fallback_explanation(evidences) -> str:
+    """Use the evidence of the most senior analyst that answered when the judge is skipped"""
+    agent_evidences = {k: v for d in evidences for k, v in d.items()}
+    for name in ("Manager", "Senior", "Junior"):
+        if agent_evidences.get(name):
+            return agent_evidences[name]
+    return ""
+
+
+def consensus_judge_node(state, config=None) -> Dict[str, Any]:
+    deadline = get_deadline(config)
+    if deadline is not None and deadline.remaining() < JUDGE_MIN_SECONDS:
+        deadline.cut("consensus_judge")
+        return {
+            "final_answer": state["final_answer"],
+            "explanation": _fallback_explanation(state["evidences"]),
+            "cut_components": list(deadline.cut_components)
+        }
 
-def consensus_judge_node(state) -> Dict[str, str]:
     judge = ConsensusJudgeAgent()
-    final_answer, explanation = judge(state["question"], state["final_answer"], state["evidences"])
+    try:
+        final_answer, explanation = run_with_deadline(
+            deadline, judge, state["question"], state["final_answer"], state["evidences"]
+        )
+    except DeadlineExceeded:
+        deadline.cut("consensus_judge")
+        final_answer, explanation = state["final_answer"], _fallback_explanation(state["evidences"])
 
     updates = {
         "final_answer": final_answer,
-        "explanation": explanation
+        "explanation": explanation,
+        "cut_components": list(deadline.cut_components) if deadline is not None else []
     }
-    return updates
+    return updates
\ No newline at end of file
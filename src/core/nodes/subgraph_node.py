@@ -1,30 +1,57 @@
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Optional
 import json
 from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.config import get_stream_writer
 from src.core.state import ViReJuniorState, ViReSeniorState, ViReManagerState
 from src.models.llm_provider import get_llm
 from src.utils.tools_utils import _process_knowledge_result
-import re
+from src.utils.tool_memo import ToolMemo
+from src.utils.deadline import DeadlineExceeded, get_deadline, run_with_deadline
 from src.utils.image_processing import pil_to_base64
-from src.utils.text_processing import extract_answer_from_result, remove_think_block
+from src.utils.prompt_utils import compile_prompt, prefix_cache_stats
+from src.utils.llm_usage import llm_call_config
+from src.utils.reasoning_budget import invoke_with_budget
+from src.utils.text_processing import StreamingAnswerParser, extract_answer_from_result, remove_think_block
+
+# Tool call ids emitted by plan_node; planned calls don't count toward an analyst's max_steps
+PLAN_CALL_ID_PREFIX = "plan_"
+
+
+def _invoke_tool(tool, tool_name: str, args: Dict[str, Any], memo: Optional[ToolMemo], image_hash: str = None):
+    """Invoke a tool, through the request-scoped memo when one is configured"""
+    if memo is None:
+        return tool.invoke(args)
+    return memo.invoke(tool_name, args, lambda: tool.invoke(args), image_hash)
+
 
 def tool_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState], 
-              tools_registry: Dict[str, Any]) -> Dict[str, Any]:
+              tools_registry: Dict[str, Any],
+              config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """Process tool calls and update state"""
+    memo = (config or {}).get("configurable", {}).get("tool_memo")
+    deadline = get_deadline(config)
     outputs = []
     tool_calls = getattr(state["messages"][-1], "tool_calls", [])
     count_of_tool_calls = state.get("count_of_tool_calls", 0)
-    updates = {"messages": state["messages"] + outputs, "count_of_tool_calls": count_of_tool_calls + len(tool_calls)} # Số tool gọi trong 1 lần có thể nhiều hơn 1 nên không thể tăng 1 lần mà phải tăng số lần gọi tool
+    # The planning LLM never sees the static plan's results, so only its own calls use up max_steps
+    planned_calls = sum(1 for tool_call in tool_calls if (tool_call.get("id") or "").startswith(PLAN_CALL_ID_PREFIX))
+    updates = {"messages": state["messages"] + outputs, "count_of_tool_calls": count_of_tool_calls + len(tool_calls) - planned_calls} # Số tool gọi trong 1 lần có thể nhiều hơn 1 nên không thể tăng 1 lần mà phải tăng số lần gọi tool
 
     for tool_call in tool_calls:
         tool_name = tool_call["name"]
         print("Agent: ", state["analyst"].name, "tool_name: ", tool_name, "args: ", tool_call["args"])
         try:
             if tool_name == "vqa_tool" or tool_name == "lm_knowledge" or tool_name == "analyze_image_object":
-                tool_call['args']['image'] = state.get("image")
-                tool_call["args"]["image"] = pil_to_base64(tool_call['args']['image']) 
-                result = tools_registry[tool_name].invoke(tool_call["args"])
+                # Attach the image to a copy of the args so the payload stays out of the message history
+                if memo is not None:
+                    image, image_hash = memo.image_payload(state.get("image"))
+                else:
+                    image, image_hash = pil_to_base64(state.get("image")), None
+                args = {**tool_call["args"], "image": image}
+                result = run_with_deadline(
+                    deadline, _invoke_tool, tools_registry[tool_name], tool_name, args, memo, image_hash
+                )
                 if tool_name == "vqa_tool":
                     updates["answer_candidate"] = result
                 elif tool_name == "lm_knowledge":
@@ -32,8 +59,10 @@ def tool_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
                 elif tool_name == "analyze_image_object":
                     updates["object_analysis"] = [result]
                 
-            elif tool_name in ["arxiv", "wikipedia"]:
-                raw_result = tools_registry[tool_name].invoke(tool_call["args"])
+            elif tool_name in ["arxiv", "wikipedia", "dense_knowledge"]:
+                raw_result = run_with_deadline(
+                    deadline, _invoke_tool, tools_registry[tool_name], tool_name, tool_call["args"], memo
+                )
                 print(f"Agent: {state['analyst'].name} - Tool: {tool_name}")
                 # Process and format the result
                 processed_result = _process_knowledge_result(raw_result, tool_name)
@@ -48,6 +77,15 @@ def tool_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
                     tool_call_id=tool_call["id"],
                 )
             )
+        except DeadlineExceeded as e:
+            deadline.cut(f"{state['analyst'].name}.{tool_name}")
+            outputs.append(
+                ToolMessage(
+                    content=f"Error: {str(e)}",
+                    name=tool_name,
+                    tool_call_id=tool_call["id"],
+                )
+            )
         except Exception as e:
             print(f"Error processing tool {tool_name}: {e}")
             outputs.append(
@@ -60,6 +98,28 @@ def tool_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
     return updates
 
 
+def plan_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
+              config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Emit the analyst's static tool plan as tool calls, without a planning LLM call"""
+    format_values = {
+        'question': state.get('question', ''),
+        'context': state.get('image_caption', ''),
+    }
+    tool_calls = [
+        {
+            "name": step["name"],
+            "args": {key: val.format(**format_values) if isinstance(val, str) else val
+                     for key, val in step.get("args", {}).items()},
+            "id": f"{PLAN_CALL_ID_PREFIX}{state['analyst'].name}_{i}"
+        }
+        for i, step in enumerate(state["analyst"].tool_plan)
+    ]
+    return {
+        "messages": state["messages"] + [AIMessage(content="", tool_calls=tool_calls)],
+        "analyst": state["analyst"]
+    }
+
+
 def call_agent_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
                    config: RunnableConfig,
                    tools_registry: Dict[str, Any]) -> Dict[str, Any]:
@@ -68,9 +128,8 @@ def call_agent_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerSt
     tools = [tools_registry[tool] for tool in tools if tool in tools_registry]
     
     llm = get_llm(tools)
-    # Auto-detect placeholders từ system prompt
-    base_prompt = state["analyst"].system_prompt
-    placeholders = re.findall(r'\{(\w+)\}', base_prompt)
+    # Static instructions go in the system message so every request shares a cacheable prefix
+    prompt = compile_prompt(state["analyst"].system_prompt)
     
     # Prepare available values
     format_values = {
@@ -78,12 +137,17 @@ def call_agent_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerSt
         'context': state.get('image_caption', ''),
     }
     
-    # Chỉ format với placeholders có trong prompt
-    format_dict = {key: format_values[key] for key in placeholders if key in format_values}
-    
-    formatted_prompt = base_prompt.format(**format_dict)
-    
-    response = llm.invoke(formatted_prompt, config)
+    deadline = get_deadline(config)
+    try:
+        response = run_with_deadline(
+            deadline, invoke_with_budget, llm, prompt.messages(format_values), "agent",
+            llm_call_config(config, state["analyst"].name, "agent")
+        )
+    except DeadlineExceeded:
+        # should_continue sees the expired deadline and routes to final_reasoning, which drops the analyst
+        deadline.cut(f"{state['analyst'].name}.agent")
+        return {"messages": state["messages"], "analyst": state["analyst"]}
+    prefix_cache_stats.record(response)
     
     return {
         "messages": state["messages"] + [response],
@@ -92,11 +156,16 @@ def call_agent_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerSt
 
 
 
-def final_reasoning_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState]) -> Dict[str, Any]:
+def final_reasoning_node(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
+                         config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """Final reasoning node to synthesize results"""
-    # Auto-detect placeholders từ final_system_prompt
-    base_prompt = state["analyst"].final_system_prompt
-    placeholders = re.findall(r'\{(\w+)\}', base_prompt)
+    # An analyst out of time returns no result, so it gets no vote
+    deadline = get_deadline(config)
+    if deadline is not None and deadline.expired():
+        deadline.cut(state["analyst"].name)
+        return {"results": [], "evidences": []}
+
+    prompt = compile_prompt(state["analyst"].final_system_prompt)
         
     # Prepare available values
     format_values = {
@@ -108,15 +177,27 @@ def final_reasoning_node(state: Union[ViReJuniorState, ViReSeniorState, ViReMana
             'Object_Analysis': "\n".join(state.get("object_analysis", []))
     }
     print("agent: ", state["analyst"].name, "state: ", format_values)
-    # Chỉ format với placeholders có trong prompt
-    format_dict = {key: format_values[key] for key in placeholders if key in format_values}
-    
-    final_system_prompt = base_prompt.format(**format_dict)
     
     llm = get_llm(temperature=0.1)
-    
-    final_response = llm.invoke(final_system_prompt)
-    cleaned_content = remove_think_block(final_response.content)
+
+    # The answer is published to the parent graph's "custom" stream as soon as its line is
+    # complete, and the generation is ended once the Evidence paragraph is closed
+    writer = get_stream_writer()
+    parser = StreamingAnswerParser(
+        on_answer=lambda answer: writer({"analyst": state["analyst"].name, "answer": answer})
+    )
+
+    try:
+        final_response = run_with_deadline(
+            deadline, invoke_with_budget, llm, prompt.messages(format_values), "final_reasoning",
+            llm_call_config(config, state["analyst"].name, "final_reasoning"), parser.feed
+        )
+    except DeadlineExceeded:
+        deadline.cut(state["analyst"].name)
+        return {"results": [], "evidences": []}
+    prefix_cache_stats.record(final_response)
+    content = final_response.content[:parser.end] if parser.complete else final_response.content
+    cleaned_content = remove_think_block(content)
     answer, evidence = extract_answer_from_result(cleaned_content)
 
     return {
@@ -125,8 +206,13 @@ def final_reasoning_node(state: Union[ViReJuniorState, ViReSeniorState, ViReMana
     }
 
 
-def should_continue(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState]) -> str:
+def should_continue(state: Union[ViReJuniorState, ViReSeniorState, ViReManagerState],
+                    config: Optional[RunnableConfig] = None) -> str:
     """Decide whether to continue with tools or move to final reasoning"""
+    deadline = get_deadline(config)
+    if deadline is not None and deadline.expired():
+        return "final_reasoning"
+
     messages = state["messages"]
     last_message = messages[-1]
     
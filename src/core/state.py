@@ -21,6 +21,9 @@ class ViReAgentState(MessagesState):
     explanation: str
     evidences: Annotated[List[Dict[str, str]], operator.add]
 
+    #---- Deadline ----#
+    cut_components: List[str]
+
 class ViReJuniorState(MessagesState):
     question: str
     image: Union[str, Image.Image]
@@ -91,9 +91,9 @@ class VQAXEvaluator:
         
         return processed_preds, processed_refs
 
-    def compute_answer_metrics(self, 
-                             predicted_answers: List[int], 
-                             ground_truth_answers: List[int]) -> Dict[str, float]:
+    @staticmethod
+    def compute_answer_metrics(predicted_answers: List[int], 
+                               ground_truth_answers: List[int]) -> Dict[str, float]:
         """
         Compute metrics for answer prediction.
         
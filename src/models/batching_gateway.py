@@ -0,0 +1,338 @@
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, convert_to_openai_messages
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+logger = logging.getLogger(__name__)
+
+# Used when the server's /models listing does not report max_model_len
+DEFAULT_MAX_MODEL_LEN = 4096
+# Status codes of the startup probe meaning the server has no completions endpoint, or
+# does not accept a list of prompts
+NO_ENDPOINT_STATUS = (404, 405)
+REJECTED_BATCH_STATUS = (400, 422)
+PROBE_PROMPTS = ["Hi", "Hi"]
+# Hermes-style tool calls, as parsed server-side by vLLM's --tool-call-parser hermes
+TOOL_CALL_PATTERN = re.compile(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", re.DOTALL)
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-batch")
+
+
+class BatchFallback(RuntimeError):
+    """Raised to a caller whose prompt could not be sent as part of a batch."""
+
+
+def render_chatml(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Minimal ChatML rendering, for servers without a HuggingFace tokenizer (e.g. the stub server)."""
+    parts = []
+    if tools:
+        parts.append("<|im_start|>system\n# Tools\n<tools>\n"
+                     + "\n".join(json.dumps(tool, ensure_ascii=False) for tool in tools)
+                     + "\n</tools><|im_end|>")
+    for message in messages:
+        content = message.get("content") or ""
+        for call in message.get("tool_calls", []):
+            function = call["function"]
+            content += f'\n<tool_call>\n{{"name": "{function["name"]}", "arguments": {function["arguments"]}}}\n</tool_call>'
+        parts.append(f"<|im_start|>{message['role']}\n{content}<|im_end|>")
+    parts.append("<|im_start|>assistant\n")
+    return "\n".join(parts)
+
+
+def parse_tool_calls(text: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Splits generated text into (content, tool calls) using the hermes <tool_call> format."""
+    tool_calls = []
+    for match in TOOL_CALL_PATTERN.finditer(text):
+        try:
+            call = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            continue
+        tool_calls.append({
+            "name": call.get("name", ""),
+            "args": call.get("arguments") or {},
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "tool_call"
+        })
+    if tool_calls:
+        text = TOOL_CALL_PATTERN.sub("", text)
+    return text.strip(), tool_calls
+
+
+class _Pending:
+    __slots__ = ("prompt", "prompt_tokens", "params", "future", "queued_at")
+
+    def __init__(self, prompt: str, prompt_tokens: int, params: Dict[str, Any]):
+        self.prompt = prompt
+        self.prompt_tokens = prompt_tokens
+        self.params = params
+        self.future: Future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class BatchingGateway:
+    """
+    Collects prompts submitted within a short window and sends them as one multi-prompt
+    /v1/completions request to a vLLM-style server.
+
+    Prompts are grouped by their sampling parameters, since one completions request shares
+    them. Support for multi-prompt requests is probed once at startup; if the server rejects
+    them, batching stays off and every caller gets BatchFallback, so it can send its own chat
+    completion instead. A batch that fails later (e.g. one prompt exceeds the context length)
+    falls back for that batch only.
+    """
+    def __init__(self, base_url: str, model: str, api_key: str = "", window_ms: float = 10.0,
+                 max_batch_size: int = 32, pool: Any = None, timeout: float = 600):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.pool = pool
+        self.timeout = timeout
+        self._max_model_len: Optional[int] = None
+        self.pending: List[_Pending] = []
+        self.cond = threading.Condition()
+        self.stats_lock = threading.Lock()
+        self.batches = 0
+        self.prompts = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batch_sizes = Counter()
+        self.queue_wait = 0.0
+        self.supported = self.probe()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    @property
+    def max_model_len(self) -> int:
+        if self._max_model_len is None:
+            try:
+                response = requests.get(f"{self.base_url}/models", headers=self.headers, timeout=5)
+                cards = {card.get("id"): card for card in response.json().get("data", [])}
+                self._max_model_len = int(cards.get(self.model, {}).get("max_model_len") or DEFAULT_MAX_MODEL_LEN)
+            except (requests.RequestException, ValueError):
+                self._max_model_len = DEFAULT_MAX_MODEL_LEN
+        return self._max_model_len
+
+    def probe(self) -> bool:
+        """
+        Sends a 2-prompt completion to check that the server accepts a list of prompts.
+        An unreachable server counts as supported, since batch failures fall back per batch.
+        """
+        base_url = self.pool.endpoints[0].base_url if self.pool is not None else self.base_url
+        payload = {"model": self.model, "prompt": PROBE_PROMPTS, "max_tokens": 1}
+        try:
+            response = requests.post(f"{base_url}/completions", json=payload, headers=self.headers, timeout=30)
+        except requests.RequestException as e:
+            logger.warning(f"LLM batching probe on {base_url} failed: {e}; assuming batching is supported")
+            return True
+        if response.status_code in NO_ENDPOINT_STATUS + REJECTED_BATCH_STATUS:
+            logger.warning(f"{base_url} rejected a batched completion ({response.status_code}: "
+                           f"{response.text[:200]}); LLM batching disabled")
+            return False
+        return True
+
+    def submit(self, prompt: str, prompt_tokens: int, params: Dict[str, Any]) -> Future:
+        """
+        Queues a rendered prompt for the next batch.
+
+        Args:
+            prompt (str): Prompt with the chat template already applied.
+            prompt_tokens (int): Prompt length in tokens, to fit max_tokens into the context.
+            params (Dict[str, Any]): Sampling parameters (temperature, stop, max_tokens, ...).
+
+        Returns:
+            Future: Resolves to (generated text, finish reason), or fails with BatchFallback.
+        """
+        item = _Pending(prompt, prompt_tokens, params)
+        if not self.supported:
+            with self.stats_lock:
+                self.fallbacks += 1
+            item.future.set_exception(BatchFallback("Server does not accept multi-prompt completions"))
+            return item.future
+        with self.cond:
+            self.pending.append(item)
+            self.cond.notify()
+        return item.future
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                # Give concurrent callers a short window to join the batch
+                self.cond.wait_for(lambda: len(self.pending) >= self.max_batch_size, timeout=self.window)
+                items, self.pending = self.pending, []
+
+            groups: Dict[str, List[_Pending]] = {}
+            for item in items:
+                groups.setdefault(json.dumps(item.params, sort_keys=True), []).append(item)
+            for group in groups.values():
+                for start in range(0, len(group), self.max_batch_size):
+                    _executor.submit(self._send, group[start:start + self.max_batch_size])
+
+    def _send(self, batch: List[_Pending]):
+        now = time.perf_counter()
+        payload = {"model": self.model, "prompt": [item.prompt for item in batch], **batch[0].params}
+        if payload.get("max_tokens") is None:
+            # One max_tokens for the whole batch, bounded by its longest prompt
+            payload["max_tokens"] = max(1, self.max_model_len - max(item.prompt_tokens for item in batch))
+
+        endpoint = self.pool.acquire() if self.pool is not None else None
+        base_url = endpoint.base_url if endpoint is not None else self.base_url
+        ok = False
+        try:
+            response = requests.post(f"{base_url}/completions", json=payload, headers=self.headers, timeout=self.timeout)
+            if response.status_code in REJECTED_BATCH_STATUS:
+                # Rejected prompts (e.g. one over the context length) fall back for this batch only;
+                # the endpoint itself answered, so it stays in rotation
+                ok = True
+                logger.warning(f"{base_url} rejected a batch of {len(batch)} ({response.status_code}: "
+                               f"{response.text[:200]}); falling back for this batch")
+                with self.stats_lock:
+                    self.rejected += 1
+                raise BatchFallback(f"Batch rejected with status {response.status_code}")
+            response.raise_for_status()
+            choices = sorted(response.json()["choices"], key=lambda choice: choice["index"])
+            if len(choices) != len(batch):
+                raise BatchFallback(f"Expected {len(batch)} choices, got {len(choices)}")
+            ok = True
+        except Exception as e:
+            if not isinstance(e, BatchFallback):
+                logger.warning(f"Batched completion on {base_url} failed: {e}")
+                with self.stats_lock:
+                    self.errors += 1
+                e = BatchFallback(str(e))
+            with self.stats_lock:
+                self.fallbacks += len(batch)
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        finally:
+            if endpoint is not None:
+                self.pool.release(endpoint, time.perf_counter() - now, ok=ok)
+
+        with self.stats_lock:
+            self.batches += 1
+            self.prompts += len(batch)
+            self.batch_sizes[len(batch)] += 1
+            self.queue_wait += sum(now - item.queued_at for item in batch)
+        for item, choice in zip(batch, choices):
+            item.future.set_result((choice.get("text", ""), choice.get("finish_reason")))
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            return {
+                "batching_supported": self.supported,
+                "batches": self.batches,
+                "prompts": self.prompts,
+                "mean_batch_size": self.prompts / self.batches if self.batches else None,
+                "max_batch_size": max(self.batch_sizes) if self.batch_sizes else None,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "mean_queue_wait_ms": 1000 * self.queue_wait / self.prompts if self.prompts else None,
+                "fallbacks": self.fallbacks,
+                "errors": self.errors,
+                "rejected_batches": self.rejected
+            }
+
+
+class BatchedChatModel(BaseChatModel):
+    """
+    Chat model that renders the chat template client-side and sends the prompt through a
+    BatchingGateway, so concurrent agent and judge calls share one server request.
+
+    Tool calls in the output are parsed in the hermes format, as the server would with
+    --tool-call-parser hermes. Prompts the gateway cannot batch go to the fallback model.
+    """
+    gateway: Any
+    fallback: Any
+    tokenizer: Any = None
+    temperature: float = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "batched-openai-completions"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.gateway.model, "temperature": self.temperature}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def render(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]],
+               extra_body: Optional[Dict[str, Any]] = None) -> Tuple[str, int]:
+        """
+        Returns the prompt text for the messages and its length in tokens.
+
+        extra_body takes the vLLM chat options that affect rendering: chat_template_kwargs,
+        and continue_final_message to extend the last assistant message instead of starting one.
+        """
+        extra_body = extra_body or {}
+        openai_messages = convert_to_openai_messages(messages)
+        continue_final = bool(extra_body.get("continue_final_message"))
+        if self.tokenizer is None:
+            prompt = render_chatml(openai_messages, tools)
+            if continue_final:
+                prompt = prompt[:prompt.rfind("<|im_end|>")]
+            return prompt, len(prompt.split())
+        prompt = self.tokenizer.apply_chat_template(
+            openai_messages, tools=tools or None, tokenize=False,
+            add_generation_prompt=not continue_final, continue_final_message=continue_final,
+            **extra_body.get("chat_template_kwargs", {})
+        )
+        return prompt, len(self.tokenizer.encode(prompt, add_special_tokens=False))
+
+    def _count_tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(text.split())
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tools = kwargs.get("tools")
+        prompt, prompt_tokens = self.render(messages, tools, kwargs.get("extra_body"))
+        params = {
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens"),
+            "stop": stop
+        }
+        try:
+            text, finish_reason = self.gateway.submit(prompt, prompt_tokens, params).result()
+        except BatchFallback:
+            return self.fallback._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        content, tool_calls = parse_tool_calls(text) if tools else (text, [])
+        completion_tokens = self._count_tokens(text)
+        message = AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            response_metadata={
+                "model_name": self.gateway.model,
+                "finish_reason": "tool_calls" if tool_calls else finish_reason
+            }
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
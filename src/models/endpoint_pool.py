@@ -0,0 +1,233 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import requests
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 10.0
+# Hedging only starts once this many latencies have been observed
+MIN_HEDGE_SAMPLES = 20
+
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-pool")
+
+
+class Endpoint:
+    """One OpenAI-compatible server and its load and latency counters."""
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.healthy = True
+        self.requests = 0
+        self.errors = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.latencies = deque(maxlen=500)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "p50_seconds": latencies[len(latencies) // 2] if latencies else None,
+            "p95_seconds": latencies[int(len(latencies) * 0.95)] if latencies else None
+        }
+
+
+class EndpointPool:
+    """
+    Least-outstanding-requests balancing over several OpenAI-compatible servers.
+
+    Endpoints are health-checked in the background through GET {base_url}/models, and an
+    endpoint whose request fails is taken out of rotation until its next successful check.
+    """
+    def __init__(self, base_urls: Sequence[str], health_interval: float = HEALTH_CHECK_INTERVAL):
+        self.endpoints = [Endpoint(url.rstrip("/")) for url in base_urls]
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self._next = 0
+        self.health_interval = health_interval
+        self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            for endpoint in self.endpoints:
+                try:
+                    healthy = requests.get(f"{endpoint.base_url}/models", timeout=2).ok
+                except requests.RequestException:
+                    healthy = False
+                if healthy != endpoint.healthy:
+                    logger.info(f"LLM endpoint {endpoint.base_url} is now {'healthy' if healthy else 'unhealthy'}")
+                endpoint.healthy = healthy
+
+    def acquire(self, exclude: Optional[Endpoint] = None) -> Endpoint:
+        """Reserves the healthy endpoint with the fewest in-flight requests (round-robin on ties)."""
+        with self.lock:
+            candidates = [e for e in self.endpoints if e.healthy and e is not exclude]
+            if not candidates:
+                # Nothing healthy: try anyway rather than fail outright
+                candidates = [e for e in self.endpoints if e is not exclude] or self.endpoints
+            self._next = (self._next + 1) % len(candidates)
+            rotated = candidates[self._next:] + candidates[:self._next]
+            endpoint = min(rotated, key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float, ok: bool, cancelled: bool = False):
+        """
+        Returns a reserved endpoint. A cancelled request (a stream closed on purpose by the
+        caller) is neither a failure nor a complete latency sample, so it only frees the slot.
+        """
+        with self.lock:
+            endpoint.outstanding -= 1
+            if cancelled:
+                pass
+            elif ok:
+                endpoint.latencies.append(latency)
+                self.latencies.append(latency)
+            else:
+                endpoint.errors += 1
+                endpoint.healthy = False
+        outcome = "cancelled" if cancelled else "ok" if ok else "error"
+        logger.debug(f"LLM endpoint {endpoint.base_url}: {latency:.2f}s ({outcome})")
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 latency across the pool, or None until enough requests have been observed."""
+        with self.lock:
+            if len(self.latencies) < MIN_HEDGE_SAMPLES:
+                return None
+            latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95)]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint.base_url: endpoint.stats() for endpoint in self.endpoints}
+
+    def log_stats(self):
+        for url, stats in self.stats().items():
+            logger.info(f"LLM endpoint {url}: {stats}")
+
+
+class PooledChatModel(BaseChatModel):
+    """
+    Chat model that spreads requests over an EndpointPool, with one ChatOpenAI client per endpoint.
+
+    With hedging on, a request still running after the pool's p95 latency is duplicated on
+    another endpoint and whichever answer arrives first is used. Streamed requests are not
+    hedged; they only fail over when the endpoint errors before the first chunk.
+    """
+    pool: Any
+    clients: Dict[str, Any]
+    hedge: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-openai"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        client = next(iter(self.clients.values()))
+        return {"model_name": client.model_name, "temperature": client.temperature}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _call(self, endpoint: Endpoint, messages: List[BaseMessage], stop: Optional[List[str]],
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        start = time.perf_counter()
+        try:
+            result = self.clients[endpoint.base_url]._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except Exception:
+            self.pool.release(endpoint, time.perf_counter() - start, ok=False)
+            raise
+        self.pool.release(endpoint, time.perf_counter() - start, ok=True)
+        return result
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        primary = self.pool.acquire()
+        delay = self.pool.hedge_delay() if self.hedge and len(self.pool.endpoints) > 1 else None
+        if delay is None:
+            try:
+                return self._call(primary, messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                # Fail over once to another endpoint
+                logger.warning(f"LLM endpoint {primary.base_url} failed: {e}")
+                return self._call(self.pool.acquire(exclude=primary), messages, stop, run_manager, **kwargs)
+
+        # Hedged calls race each other, so neither reports tokens to the callbacks
+        futures = {_executor.submit(self._call, primary, messages, stop, **kwargs): primary}
+        done, _ = wait(futures, timeout=delay)
+        primary_failed = bool(done) and next(iter(done)).exception() is not None
+        # A backup goes out when the primary is slow, or fails over when it has already failed
+        if not done or primary_failed:
+            backup = self.pool.acquire(exclude=primary)
+            if primary_failed:
+                logger.warning(f"LLM endpoint {primary.base_url} failed: {next(iter(done)).exception()}")
+            else:
+                with self.pool.lock:
+                    backup.hedges_sent += 1
+            futures[_executor.submit(self._call, backup, messages, stop, **kwargs)] = backup
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] is not primary and not primary_failed:
+                        with self.pool.lock:
+                            futures[future].hedges_won += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        # Streams are not hedged; they fail over once if the endpoint errors before the first chunk
+        endpoint = self.pool.acquire()
+        for attempt in range(2):
+            start = time.perf_counter()
+            ok, cancelled, started = False, False, False
+            try:
+                for chunk in self.clients[endpoint.base_url]._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    yield chunk
+                ok = True
+                return
+            except GeneratorExit:
+                # The caller closed the stream early (e.g. the answer was already complete)
+                cancelled = True
+                raise
+            except Exception as e:
+                if started or attempt == 1:
+                    raise
+                logger.warning(f"LLM endpoint {endpoint.base_url} failed: {e}")
+            finally:
+                self.pool.release(endpoint, time.perf_counter() - start, ok=ok, cancelled=cancelled)
+            endpoint = self.pool.acquire(exclude=endpoint)
@@ -1,7 +1,88 @@
+import os
 from langchain_openai import ChatOpenAI
 from typing import Optional, List, Any
 from pydantic import SecretStr
 
+from src.models.endpoint_pool import EndpointPool, PooledChatModel
+from src.models.batching_gateway import BatchingGateway, BatchedChatModel
+from src.utils.llm_cache import LLM_CACHE_FILENAME, LLMResponseCache
+
+LLM_MODEL = "Qwen/Qwen3-1.7B"
+LLM_API_KEY = "lm_studio"
+
+# Comma-separated OpenAI-compatible base URLs; several URLs enable the load-balanced pool
+LLM_BASE_URLS = [url.strip() for url in os.getenv("LLM_BASE_URLS", "http://127.0.0.1:1234/v1").split(",") if url.strip()]
+# Duplicate requests still running after the pool's p95 latency on another endpoint
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+# Collect concurrent prompts for this long and send them as one multi-prompt completion (0 disables)
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "32"))
+# Tokenizer whose chat template renders batched prompts; must match the served model
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", LLM_MODEL)
+# Directory of the exact-match LLM response cache; empty disables caching
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+# Cached responses are only reused within a namespace; change it when the served weights change
+LLM_CACHE_NAMESPACE = os.getenv("LLM_CACHE_NAMESPACE", LLM_MODEL)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+# Also cache sampled (temperature > 0) calls, which then replay one stored sample
+LLM_CACHE_SAMPLED = os.getenv("LLM_CACHE_SAMPLED", "0") == "1"
+
+_endpoint_pool: Optional[EndpointPool] = None
+_batching_gateway: Optional[BatchingGateway] = None
+_tokenizer = None
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_endpoint_pool() -> Optional[EndpointPool]:
+    """Shared endpoint pool, or None when a single LLM server is configured"""
+    global _endpoint_pool
+    if len(LLM_BASE_URLS) > 1 and _endpoint_pool is None:
+        _endpoint_pool = EndpointPool(LLM_BASE_URLS)
+    return _endpoint_pool
+
+
+def get_batching_gateway() -> Optional[BatchingGateway]:
+    """Shared batching gateway, or None when LLM request batching is disabled"""
+    global _batching_gateway
+    if LLM_BATCH_WINDOW_MS > 0 and _batching_gateway is None:
+        _batching_gateway = BatchingGateway(
+            LLM_BASE_URLS[0], LLM_MODEL, api_key=LLM_API_KEY,
+            window_ms=LLM_BATCH_WINDOW_MS, max_batch_size=LLM_BATCH_MAX_SIZE, pool=get_endpoint_pool()
+        )
+    return _batching_gateway
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Shared LLM response cache, or None when LLM_CACHE_DIR is not set"""
+    global _llm_cache
+    if LLM_CACHE_DIR and _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            os.path.join(LLM_CACHE_DIR, LLM_CACHE_FILENAME), LLM_CACHE_NAMESPACE,
+            LLM_CACHE_MAX_ENTRIES, int(LLM_CACHE_MAX_MB * 2 ** 20)
+        )
+    return _llm_cache
+
+
+def _get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import AutoTokenizer
+        _tokenizer = AutoTokenizer.from_pretrained(LLM_TOKENIZER)
+    return _tokenizer
+
+
+def _chat_openai(base_url: str, temperature: float) -> ChatOpenAI:
+    return ChatOpenAI(
+        base_url=base_url,
+        api_key=SecretStr(LLM_API_KEY),
+        model=LLM_MODEL,
+        temperature=temperature,
+        # Streamed so usage accounting sees the first token; usage arrives in the last chunk
+        streaming=True,
+        stream_usage=True,
+    )
+
 
 def get_llm(with_tools: Optional[List[Any]] = None, temperature: float = 0):
     """
@@ -12,16 +93,30 @@ def get_llm(with_tools: Optional[List[Any]] = None, temperature: float = 0):
         temperature: Temperature setting for the LLM
         
     Returns:
-        ChatOpenAI instance, optionally bound with tools
+        ChatOpenAI instance (or a pooled and/or batched model), optionally bound with tools
     """
-    llm = ChatOpenAI(
-        base_url="http://127.0.0.1:1234/v1",   
-        api_key=SecretStr("lm_studio"),        
-        model="Qwen/Qwen3-1.7B",      
-        temperature=temperature,
-    )
+    pool = get_endpoint_pool()
+    if pool is None:
+        llm = _chat_openai(LLM_BASE_URLS[0], temperature)
+    else:
+        llm = PooledChatModel(
+            pool=pool,
+            clients={endpoint.base_url: _chat_openai(endpoint.base_url, temperature) for endpoint in pool.endpoints},
+            hedge=LLM_HEDGE,
+        )
+
+    gateway = get_batching_gateway()
+    if gateway is not None:
+        # Prompts the gateway cannot batch are sent by the chat model built above
+        llm = BatchedChatModel(gateway=gateway, fallback=llm, tokenizer=_get_tokenizer(), temperature=temperature)
+
+    cache = get_llm_cache()
+    if cache is not None and (temperature == 0 or LLM_CACHE_SAMPLED):
+        # Only the outermost model caches, so the key covers the model, temperature,
+        # bound tool schemas and the full message list exactly once
+        llm.cache = cache
     
     if with_tools:
         llm = llm.bind_tools(with_tools)
     
-    return llm
\ No newline at end of file
+    return llm
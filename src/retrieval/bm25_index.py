@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import mmap
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# On-disk layout of an index directory
+META_FILENAME = "meta.json"
+LEXICON_FILENAME = "lexicon.json"
+POSTINGS_FILENAME = "postings.bin"
+DOCS_FILENAME = "docs.bin"
+DOC_OFFSETS_FILENAME = "doc_offsets.npy"
+DOC_LENGTHS_FILENAME = "doc_lengths.npy"
+
+NO_RESULT = "No good Wikipedia Search Result was found"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; Vietnamese is tokenized per syllable."""
+    return _TOKEN_RE.findall(unicodedata.normalize("NFC", text).lower())
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """
+    Encodes non-negative integers as LEB128 varints (7 bits per byte, high bit = more bytes).
+
+    Args:
+        values (np.ndarray): 1-D array of non-negative integers below 2**35.
+
+    Returns:
+        bytes: The concatenated encodings.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        nbytes += values >= (1 << shift)
+    starts = np.concatenate(([0], np.cumsum(nbytes)[:-1]))
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max(initial=0))):
+        mask = nbytes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= np.where(nbytes[mask] > k + 1, 0x80, 0).astype(np.uint64)
+        out[starts[mask] + k] = byte
+    return out.tobytes()
+
+
+def decode_varints(buf: np.ndarray) -> np.ndarray:
+    """Decodes a uint8 array of concatenated LEB128 varints into uint64 values."""
+    if len(buf) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero((buf & 0x80) == 0)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    group = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    shifts = (np.arange(len(buf)) - starts[group]) * 7
+    payload = (buf & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.add.reduceat(payload, starts)
+
+
+class BM25IndexBuilder:
+    """
+    Accumulates documents in memory and writes a BM25 index directory.
+
+    Postings per term are (doc id delta, term frequency) pairs encoded as varints.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, array] = {}
+        self.doc_lengths = array("I")
+        self.doc_offsets = array("Q", [0])
+        self.docs = bytearray()
+
+    def add(self, title: str, summary: str, text: str = ""):
+        """
+        Adds a page. The title and text (or the summary, if no text is given) are indexed;
+        title and summary are stored for display.
+        """
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(f"{title} {text or summary}")
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, array("I")).extend((doc_id, tf))
+        self.doc_lengths.append(len(tokens))
+
+        summary = " ".join(summary.split())
+        self.docs.extend(f"{title}\t{summary}".encode("utf-8"))
+        self.doc_offsets.append(len(self.docs))
+
+    def write(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        lexicon = {}
+        offset = 0
+        with open(os.path.join(index_dir, POSTINGS_FILENAME), "wb") as f:
+            for term in sorted(self.postings):
+                pairs = np.frombuffer(self.postings[term], dtype=np.uint32).reshape(-1, 2).astype(np.uint64)
+                pairs[1:, 0] = np.diff(pairs[:, 0])
+                encoded = encode_varints(pairs.reshape(-1))
+                f.write(encoded)
+                lexicon[term] = [len(pairs), offset, len(encoded)]
+                offset += len(encoded)
+
+        with open(os.path.join(index_dir, LEXICON_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(lexicon, f, ensure_ascii=False)
+        with open(os.path.join(index_dir, DOCS_FILENAME), "wb") as f:
+            f.write(self.docs)
+        np.save(os.path.join(index_dir, DOC_OFFSETS_FILENAME), np.frombuffer(self.doc_offsets, dtype=np.uint64))
+        np.save(os.path.join(index_dir, DOC_LENGTHS_FILENAME), np.frombuffer(self.doc_lengths, dtype=np.uint32))
+
+        num_docs = len(self.doc_lengths)
+        meta = {
+            "num_docs": num_docs,
+            "avg_doc_length": float(sum(self.doc_lengths)) / num_docs if num_docs else 0.0,
+            "k1": self.k1,
+            "b": self.b
+        }
+        with open(os.path.join(index_dir, META_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+class BM25Index:
+    """
+    Read-only BM25 index. Postings, stored pages and document lengths are memory-mapped,
+    so only the pages of postings lists a query touches are read from disk.
+    """
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, META_FILENAME), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, LEXICON_FILENAME), encoding="utf-8") as f:
+            self.lexicon: Dict[str, List[int]] = json.load(f)
+        self.num_docs = meta["num_docs"]
+        self.avg_doc_length = meta["avg_doc_length"] or 1.0
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+
+        self.postings = self._map(os.path.join(index_dir, POSTINGS_FILENAME))
+        self.docs = self._map(os.path.join(index_dir, DOCS_FILENAME))
+        self.doc_offsets = np.load(os.path.join(index_dir, DOC_OFFSETS_FILENAME), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(index_dir, DOC_LENGTHS_FILENAME), mmap_mode="r")
+
+    @staticmethod
+    def _map(path: str) -> np.ndarray:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        with open(path, "rb") as f:
+            return np.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+
+    def _term_scores(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        df, offset, nbytes = self.lexicon[term]
+        pairs = decode_varints(self.postings[offset:offset + nbytes]).reshape(-1, 2)
+        doc_ids = np.cumsum(pairs[:, 0]).astype(np.int64)
+        tf = pairs[:, 1].astype(np.float32)
+        idf = np.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_ids] / self.avg_doc_length)
+        return doc_ids, (idf * tf * (self.k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def search(self, query: str, top_k: int = 2) -> List[Tuple[float, str, str]]:
+        """
+        Ranks pages against the query with BM25.
+
+        Returns:
+            List[Tuple[float, str, str]]: (score, title, summary) for the best top_k pages.
+        """
+        terms = [term for term in set(tokenize(query)) if term in self.lexicon]
+        if not terms:
+            return []
+        doc_ids, scores = zip(*(self._term_scores(term) for term in terms))
+        unique_ids, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+
+        k = min(top_k, len(totals))
+        best = np.argpartition(-totals, k - 1)[:k]
+        best = best[np.argsort(-totals[best])]
+        return [(float(totals[i]), *self.page(int(unique_ids[i]))) for i in best]
+
+    def page(self, doc_id: int) -> Tuple[str, str]:
+        """Returns the stored (title, summary) of a page."""
+        start, end = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+        title, _, summary = bytes(self.docs[start:end]).decode("utf-8").partition("\t")
+        return title, summary
+
+
+def format_pages(pages: List[Tuple[float, str, str]]) -> str:
+    """Formats search hits like WikipediaAPIWrapper, which _process_wikipedia_result parses."""
+    if not pages:
+        return NO_RESULT
+    return "\n\n".join(f"Page: {title}\nSummary: {summary}" for _, title, summary in pages)
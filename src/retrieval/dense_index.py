@@ -0,0 +1,227 @@
+import os
+import json
+import mmap
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+# On-disk layout of an index directory
+META_FILENAME = "meta.json"
+VECTORS_FILENAME = "vectors.npy"
+SCALES_FILENAME = "scales.npy"
+PASSAGES_FILENAME = "passages.bin"
+PASSAGE_OFFSETS_FILENAME = "passage_offsets.npy"
+
+VECTOR_DTYPES = ("float16", "int8")
+NO_RESULT = "No relevant passage was found"
+
+# Rows scored per matmul block, bounding the float32 working set for large corpora
+SEARCH_BLOCK_ROWS = 65536
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization. Returns (int8 vectors, float32 row scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+class TextEncoder:
+    """
+    Mean-pooled, L2-normalized sentence embeddings from a HuggingFace encoder.
+    """
+    def __init__(self, model_name: str, device: Optional[str] = None, max_length: int = 256):
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device).eval()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 array of unit-length embeddings."""
+        outputs = []
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                batch = self.tokenizer(
+                    texts[start:start + batch_size], padding=True, truncation=True,
+                    max_length=self.max_length, return_tensors="pt"
+                ).to(self.device)
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, dim=-1)
+                outputs.append(pooled.float().cpu().numpy())
+        return np.concatenate(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+
+def write_dense_index(index_dir: str, vectors: np.ndarray, passages: List[Tuple[str, str]],
+                      model_name: str, dtype: str = "float16",
+                      query_prefix: str = "", passage_prefix: str = ""):
+    """
+    Writes a dense index directory.
+
+    Args:
+        index_dir (str): Output directory.
+        vectors (np.ndarray): (num_passages, dim) unit-length float32 embeddings.
+        passages (List[Tuple[str, str]]): (title, text) per row of vectors.
+        model_name (str): Encoder used, reloaded at query time.
+        dtype (str): Storage type, "float16" or "int8" (per-row scaled).
+        query_prefix (str): Prefix the encoder expects on queries (e.g. "query: " for E5).
+        passage_prefix (str): Prefix used when encoding passages.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unknown vector dtype: {dtype}, expected one of {VECTOR_DTYPES}")
+    os.makedirs(index_dir, exist_ok=True)
+
+    if dtype == "int8":
+        vectors, scales = quantize_int8(vectors)
+        np.save(os.path.join(index_dir, SCALES_FILENAME), scales)
+    else:
+        vectors = vectors.astype(np.float16)
+    np.save(os.path.join(index_dir, VECTORS_FILENAME), vectors)
+
+    offsets = [0]
+    with open(os.path.join(index_dir, PASSAGES_FILENAME), "wb") as f:
+        for title, text in passages:
+            record = f"{title}\t{' '.join(text.split())}".encode("utf-8")
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(os.path.join(index_dir, PASSAGE_OFFSETS_FILENAME), np.asarray(offsets, dtype=np.uint64))
+
+    meta = {
+        "num_passages": len(passages),
+        "dim": int(vectors.shape[1]),
+        "dtype": dtype,
+        "model_name": model_name,
+        "query_prefix": query_prefix,
+        "passage_prefix": passage_prefix
+    }
+    with open(os.path.join(index_dir, META_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+class DenseIndex:
+    """
+    Read-only dense passage index. The vector matrix is memory-mapped and searched with
+    blocked matrix multiplies, so many queries are scored in one pass over the corpus.
+    """
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, META_FILENAME), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILENAME), mmap_mode="r")
+        self.scales = None
+        if self.meta["dtype"] == "int8":
+            self.scales = np.load(os.path.join(index_dir, SCALES_FILENAME), mmap_mode="r")
+        self.offsets = np.load(os.path.join(index_dir, PASSAGE_OFFSETS_FILENAME), mmap_mode="r")
+        passages_path = os.path.join(index_dir, PASSAGES_FILENAME)
+        self.passages = b""
+        if os.path.getsize(passages_path):
+            with open(passages_path, "rb") as f:
+                self.passages = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def search_vectors(self, queries: np.ndarray, top_k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact inner-product top-k for a batch of query embeddings.
+
+        Args:
+            queries (np.ndarray): (num_queries, dim) float32 embeddings.
+            top_k (int): Results per query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (scores, row ids), each (num_queries, k), best first.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        k = min(top_k, len(self.vectors))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores = queries @ block.T
+            if self.scales is not None:
+                scores *= self.scales[start:start + len(block)]
+
+            # Keep only each block's top-k before merging with the running best
+            kb = min(k, scores.shape[1])
+            ids = np.argpartition(-scores, kb - 1, axis=1)[:, :kb]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, ids, axis=1)], axis=1)
+            best_ids = np.concatenate([best_ids, ids + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_ids, order, axis=1)
+
+    def passage(self, row: int) -> Tuple[str, str]:
+        """Returns the stored (title, text) of a passage."""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        title, _, text = self.passages[start:end].decode("utf-8").partition("\t")
+        return title, text
+
+
+class DenseRetriever:
+    """
+    Encodes queries and searches a DenseIndex, coalescing concurrent calls into one batch.
+
+    Analysts querying at the same time (e.g. parallel subgraphs across samples) share one
+    encoder forward and one pass over the vector matrix.
+    """
+    def __init__(self, index: DenseIndex, encoder: TextEncoder,
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.index = index
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending: List[Tuple[str, int, Future]] = []
+        self.cond = threading.Condition()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def search_batch(self, queries: List[str], top_k: int = 3) -> List[List[Tuple[float, str, str]]]:
+        """Returns (score, title, text) hits for each query, computed in one batch."""
+        if not queries:
+            return []
+        prefix = self.index.meta.get("query_prefix", "")
+        embeddings = self.encoder.encode([prefix + query for query in queries])
+        scores, rows = self.index.search_vectors(embeddings, top_k)
+        return [
+            [(float(score), *self.index.passage(int(row))) for score, row in zip(score_row, id_row)]
+            for score_row, id_row in zip(scores, rows)
+        ]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[float, str, str]]:
+        """Queues a single query to be served with whatever other queries arrive alongside it."""
+        future: Future = Future()
+        with self.cond:
+            self.pending.append((query, top_k, future))
+            self.cond.notify()
+        return future.result()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                # Give concurrent callers a short window to join the batch
+                self.cond.wait_for(lambda: len(self.pending) >= self.max_batch_size, timeout=self.max_wait)
+                batch = self.pending[:self.max_batch_size]
+                self.pending = self.pending[self.max_batch_size:]
+            try:
+                results = self.search_batch([query for query, _, _ in batch], max(k for _, k, _ in batch))
+                for (_, top_k, future), hits in zip(batch, results):
+                    future.set_result(hits[:top_k])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+
+
+def format_passages(hits: List[Tuple[float, str, str]], max_chars: int = 300) -> str:
+    """Formats hits in the same compact style as processed Wikipedia results."""
+    if not hits:
+        return NO_RESULT
+    return "\n\n".join(f"Passage - {title}: {text[:max_chars]}..." for _, title, text in hits)
@@ -1,3 +1,5 @@
+import os
+from langchain_core.tools import tool
 from langchain_community.tools import (
     ArxivQueryRun,
     WikipediaQueryRun,
@@ -7,10 +9,47 @@ from langchain_community.utilities import (
     WikipediaAPIWrapper,
 )
 from src.utils.rate_limiter import rate_limiter
+from src.utils.knowledge_cache import KNOWLEDGE_CACHE_OFFLINE, knowledge_cache
+from src.retrieval.bm25_index import BM25Index, format_pages
 
-# Rate limits according to API docs
+# Rate limits according to API docs: one call per DELAY seconds after an initial BURST
 ARXIV_DELAY = 3.0 
+ARXIV_BURST = 1
 WIKIPEDIA_DELAY = 3.0 
+WIKIPEDIA_BURST = 3
+
+# "api" queries live Wikipedia; "local" searches the index built by script/build_wiki_index.py
+WIKIPEDIA_BACKEND = os.getenv("WIKIPEDIA_BACKEND", "api")
+WIKIPEDIA_INDEX_DIR = os.getenv("WIKIPEDIA_INDEX_DIR", "indexes/wikipedia")
+WIKIPEDIA_LOCAL_TOP_K = int(os.getenv("WIKIPEDIA_LOCAL_TOP_K", "2"))
+
+# Dense passage index built by script/build_dense_index.py; the dense_knowledge tool is off when unset
+DENSE_INDEX_DIR = os.getenv("DENSE_INDEX_DIR")
+DENSE_TOP_K = int(os.getenv("DENSE_TOP_K", "2"))
+DENSE_DEVICE = os.getenv("DENSE_DEVICE")
+
+rate_limiter.configure("arxiv", 1.0 / ARXIV_DELAY, ARXIV_BURST)
+rate_limiter.configure("wikipedia", 1.0 / WIKIPEDIA_DELAY, WIKIPEDIA_BURST)
+
+
+def _cached_run(service: str, query: str, fetcher) -> str:
+    """Serves a query from the knowledge cache, going to the rate-limited API only on a miss."""
+    def fetch(q: str) -> str:
+        rate_limiter.acquire(service)
+        return fetcher(q)
+    return knowledge_cache.fetch(service, query, fetch, offline=KNOWLEDGE_CACHE_OFFLINE)
+
+
+class CachedArxivQueryRun(ArxivQueryRun):
+    """ArxivQueryRun backed by the persistent knowledge cache"""
+    def _run(self, query: str, run_manager=None) -> str:
+        return _cached_run("arxiv", query, lambda q: super(CachedArxivQueryRun, self)._run(q, run_manager))
+
+
+class CachedWikipediaQueryRun(WikipediaQueryRun):
+    """WikipediaQueryRun backed by the persistent knowledge cache"""
+    def _run(self, query: str, run_manager=None) -> str:
+        return _cached_run("wikipedia", query, lambda q: super(CachedWikipediaQueryRun, self)._run(q, run_manager))
 
 
 arxiv_wrapper = ArxivAPIWrapper(
@@ -18,24 +57,53 @@ arxiv_wrapper = ArxivAPIWrapper(
     arxiv_search=None,
     arxiv_exceptions=None
 )
-arxiv = ArxivQueryRun(api_wrapper=arxiv_wrapper)
+arxiv = CachedArxivQueryRun(api_wrapper=arxiv_wrapper)
 
 wikipedia_wrapper = WikipediaAPIWrapper(top_k_results=1, wiki_client=None)
-wikipedia = WikipediaQueryRun(
+wikipedia = CachedWikipediaQueryRun(
     api_wrapper=wikipedia_wrapper,
     description="Search for information on a given topic using Wikipedia"
 )
 
 
-@rate_limiter.rate_limit("arxiv", ARXIV_DELAY)
+def build_local_wikipedia_tool(index_dir: str, top_k: int):
+    """Drop-in `wikipedia` tool answering from a local BM25 index, in the WikipediaAPIWrapper output format"""
+    index = BM25Index(index_dir)
+
+    @tool("wikipedia")
+    def local_wikipedia(query: str) -> str:
+        """Search for information on a given topic using Wikipedia"""
+        return format_pages(index.search(query, top_k))
+
+    return local_wikipedia
+
+
+if WIKIPEDIA_BACKEND == "local":
+    wikipedia = build_local_wikipedia_tool(WIKIPEDIA_INDEX_DIR, WIKIPEDIA_LOCAL_TOP_K)
+elif WIKIPEDIA_BACKEND != "api":
+    raise ValueError(f"Unknown WIKIPEDIA_BACKEND: {WIKIPEDIA_BACKEND}, expected 'api' or 'local'")
+
+
+# The tools rate limit their own cache misses, so cached queries are never throttled
 def search_arxiv(query: str) -> str:
     """Search for information on a given topic using Arxiv"""
     return arxiv.run(query)
 
-@rate_limiter.rate_limit("wikipedia", WIKIPEDIA_DELAY)
 def search_wikipedia(query: str) -> str:
     """Search for information on a given topic using Wikipedia"""
     return wikipedia.invoke(query)
 
 
+def build_dense_knowledge_tool(index_dir: str, top_k: int, device: str = None):
+    """Knowledge tool retrieving passages by embedding similarity; concurrent calls are batched"""
+    from src.retrieval.dense_index import DenseIndex, DenseRetriever, TextEncoder, format_passages
+
+    index = DenseIndex(index_dir)
+    retriever = DenseRetriever(index, TextEncoder(index.meta["model_name"], device))
+
+    @tool("dense_knowledge")
+    def dense_knowledge(query: str) -> str:
+        """Retrieve background knowledge passages semantically related to the query (works well for Vietnamese questions)"""
+        return format_passages(retriever.search(query, top_k))
 
+    return dense_knowledge
@@ -0,0 +1,72 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional
+
+# Workers for deadline-bounded calls; a call that times out keeps its worker until it returns
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish within the remaining request budget."""
+
+
+class Deadline:
+    """
+    Latency budget for one graph invocation, passed to nodes as config["configurable"]["deadline"].
+
+    Nodes run tools and LLM calls through run(), which stops waiting once the budget is spent,
+    and record every component they drop with cut().
+    """
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.lock = threading.Lock()
+        self.cut_components: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs fn in a worker thread and waits at most the remaining budget for its result.
+
+        Raises:
+            DeadlineExceeded: If the budget is spent before fn returns. The call is abandoned;
+                its result is discarded when it eventually finishes.
+        """
+        if self.expired():
+            raise DeadlineExceeded("Request deadline already exceeded")
+        # Run in a copy of the caller's context so callbacks and graph context vars still apply
+        future = _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            # A TimeoutError raised by fn itself is re-raised as is
+            if future.done():
+                raise
+            future.cancel()
+            raise DeadlineExceeded(f"Call did not finish within the {self.budget_seconds:g}s request budget")
+
+    def cut(self, component: str):
+        """Records a component dropped because of the deadline."""
+        with self.lock:
+            if component not in self.cut_components:
+                self.cut_components.append(component)
+        print(f"Deadline: cut {component}")
+
+
+def get_deadline(config: Optional[dict]) -> Optional[Deadline]:
+    """Returns the request deadline from a node config, or None if the request is unbounded."""
+    return (config or {}).get("configurable", {}).get("deadline")
+
+
+def run_with_deadline(deadline: Optional[Deadline], fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Calls fn directly when there is no deadline, otherwise bounds it by the remaining budget."""
+    if deadline is None:
+        return fn(*args, **kwargs)
+    return deadline.run(fn, *args, **kwargs)
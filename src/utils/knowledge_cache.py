@@ -0,0 +1,156 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Callable, Dict, Optional, Tuple
+
+# Cache location and bounds; OFFLINE serves every cached entry regardless of age and never fetches
+KNOWLEDGE_CACHE_PATH = os.getenv("KNOWLEDGE_CACHE_PATH", os.path.join(".cache", "knowledge_cache.sqlite"))
+KNOWLEDGE_CACHE_TTL = float(os.getenv("KNOWLEDGE_CACHE_TTL", str(30 * 24 * 3600)))
+KNOWLEDGE_CACHE_MAX_ENTRIES = int(os.getenv("KNOWLEDGE_CACHE_MAX_ENTRIES", "50000"))
+KNOWLEDGE_CACHE_OFFLINE = os.getenv("KNOWLEDGE_CACHE_OFFLINE", "0") == "1"
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a query so trivially different spellings share a cache entry."""
+    query = unicodedata.normalize("NFC", query).lower()
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class KnowledgeCacheMiss(RuntimeError):
+    """Raised in offline mode when a query has no cached result."""
+
+
+class KnowledgeCache:
+    """
+    Disk-backed cache of knowledge-tool results, keyed by tool and normalized query.
+
+    Entries expire after ttl_seconds and the least recently used ones are evicted beyond
+    max_entries. Expired entries are kept until evicted so they can still be served when
+    a refetch fails.
+    """
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        """
+        Initializes the cache.
+
+        Args:
+            path (str): SQLite database file, created if missing.
+            ttl_seconds (float): Age after which an entry is refetched.
+            max_entries (int): Maximum number of stored entries.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS knowledge ("
+            "key TEXT PRIMARY KEY, tool TEXT, query TEXT, value TEXT, "
+            "created_at REAL, accessed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS knowledge_accessed ON knowledge (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(tool: str, query: str) -> str:
+        return hashlib.sha256(f"{tool}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, tool: str, query: str) -> Tuple[Optional[str], bool]:
+        """Returns (value, fresh) for a cached entry, or (None, False) if there is none."""
+        key = self.make_key(tool, query)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM knowledge WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            self.conn.execute("UPDATE knowledge SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        value, created_at = row
+        return value, time.time() - created_at < self.ttl_seconds
+
+    def _count(self, hit: bool, stale: bool = False):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.stale_hits += int(stale)
+
+    def fetch(self, tool: str, query: str, fetcher: Callable[[str], str], offline: bool = False) -> str:
+        """
+        Returns the cached result for (tool, query), calling fetcher on a miss or expired entry.
+
+        If the fetch fails, an expired entry is served instead of the error.
+
+        Args:
+            tool (str): Tool name, part of the cache key.
+            query (str): Raw query; normalized for the key, passed unchanged to fetcher.
+            fetcher (Callable[[str], str]): Performs the actual lookup.
+            offline (bool): Serve cached entries regardless of age and never call fetcher.
+
+        Raises:
+            KnowledgeCacheMiss: If offline and the query is not cached.
+        """
+        value, fresh = self.lookup(tool, query)
+        if value is not None and (fresh or offline):
+            self._count(hit=True, stale=not fresh)
+            return value
+        self._count(hit=False)
+        if offline:
+            raise KnowledgeCacheMiss(f"{tool} query not cached in offline mode: {query}")
+
+        try:
+            result = fetcher(query)
+        except Exception:
+            if value is None:
+                raise
+            with self.lock:
+                self.stale_hits += 1
+            return value
+        self.put(tool, query, result)
+        return result
+
+    def put(self, tool: str, query: str, value: str):
+        """Stores a result, evicting least recently used entries beyond max_entries."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO knowledge (key, tool, query, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.make_key(tool, query), tool, normalize_query(query), value, now, now)
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM knowledge").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM knowledge WHERE key IN "
+                    "(SELECT key FROM knowledge ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM knowledge").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Global knowledge cache instance
+knowledge_cache = KnowledgeCache(KNOWLEDGE_CACHE_PATH, KNOWLEDGE_CACHE_TTL, KNOWLEDGE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+LLM_CACHE_FILENAME = "llm_cache.sqlite"
+
+
+def _dump_generations(generations: Sequence[Generation]) -> str:
+    return json.dumps([
+        {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+        if isinstance(g, ChatGeneration) else {"text": g.text, "generation_info": g.generation_info}
+        for g in generations
+    ], ensure_ascii=False)
+
+
+def _load_generations(value: str) -> List[Generation]:
+    return [
+        ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g["generation_info"])
+        if "message" in g else Generation(text=g["text"], generation_info=g["generation_info"])
+        for g in json.loads(value)
+    ]
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Disk-backed exact-match cache of LLM responses, used as the chat model's cache.
+
+    LangChain looks entries up by the serialized message list and the model's llm_string,
+    which covers the model name, sampling parameters, stop words and bound tool schemas.
+    Entries are scoped to a namespace, and the least recently used ones are evicted beyond
+    max_entries or max_bytes of stored responses.
+    """
+    def __init__(self, path: str, namespace: str, max_entries: int, max_bytes: int):
+        """
+        Initializes the cache.
+
+        Args:
+            path (str): SQLite database file, created if missing.
+            namespace (str): Model version the entries belong to.
+            max_entries (int): Maximum number of stored responses.
+            max_bytes (int): Maximum total size of stored responses.
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, namespace TEXT, value TEXT, size INTEGER, "
+            "created_at REAL, accessed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_accessed ON llm_responses (accessed_at)")
+        self.conn.commit()
+
+    def make_key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.make_key(prompt, llm_string)
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return _load_generations(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Stores a response, evicting least recently used entries beyond the size limits."""
+        value = _dump_generations(return_val)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, namespace, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.make_key(prompt, llm_string), self.namespace, value, len(value), now, now)
+            )
+            count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+            evict = max(count - self.max_entries, 0)
+            if size > self.max_bytes:
+                # Also drop the oldest entries until the remaining ones fit in max_bytes
+                freed = over_size = 0
+                for (entry_size,) in self.conn.execute("SELECT size FROM llm_responses ORDER BY accessed_at"):
+                    if size - freed <= self.max_bytes:
+                        break
+                    freed += entry_size
+                    over_size += 1
+                evict = max(evict, over_size)
+            if evict:
+                self.conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN "
+                    "(SELECT key FROM llm_responses ORDER BY accessed_at LIMIT ?)",
+                    (evict,)
+                )
+            self.conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Deletes the entries of this namespace."""
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_responses WHERE namespace = ?", (self.namespace,))
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "entries": entries,
+                "megabytes": size / 2 ** 20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,179 @@
+import os
+import re
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+THINK_PATTERN = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+
+# Optional prices for a hosted LLM, used for the run-level cost estimate
+LLM_PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0"))
+LLM_PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "0"))
+
+_TOKEN_FIELDS = ("input_tokens", "output_tokens", "think_tokens_est", "cached_tokens")
+
+
+def llm_call_config(config: Optional[RunnableConfig], analyst: str, node: str) -> RunnableConfig:
+    """Returns config with the analyst and node an LLM call is accounted to."""
+    return merge_configs(config or {}, {"metadata": {"analyst": analyst, "llm_node": node}})
+
+
+class LLMUsageTracker(BaseCallbackHandler):
+    """
+    Request-scoped record of every LLM call: token usage, latency and time to first token,
+    tagged by analyst and node. Passed to the graph as a callback, so it sees the calls of
+    all nodes, including those run in deadline worker threads.
+
+    Time to first token is only known for streamed calls. Qwen3 reports no separate count
+    for <think> tokens, so think_tokens_est splits output tokens by the think block's share
+    of the generated text.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[UUID, Dict[str, Any]] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *,
+                            run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        metadata = metadata or {}
+        with self.lock:
+            self.calls[run_id] = {
+                "analyst": metadata.get("analyst", "unknown"),
+                "node": metadata.get("llm_node", metadata.get("langgraph_node", "unknown")),
+                "start": time.perf_counter(),
+                "first_token": None,
+                "streamed_tokens": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "think_tokens_est": 0,
+                "cached_tokens": 0,
+                "latency_seconds": None,
+                "ttft_seconds": None,
+                "stopped_early": False,
+                "error": None
+            }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        call = self.calls.get(run_id)
+        if call is not None and token:
+            call["streamed_tokens"] += 1
+            if call["first_token"] is None:
+                call["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        call = self.calls.get(run_id)
+        if call is None:
+            return
+        end = time.perf_counter()
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        text = message.content if message is not None and isinstance(message.content, str) else ""
+        think_chars = sum(len(block) for block in THINK_PATTERN.findall(text))
+
+        with self.lock:
+            call["latency_seconds"] = end - call["start"]
+            if call["first_token"] is not None:
+                call["ttft_seconds"] = call["first_token"] - call["start"]
+            call["input_tokens"] = usage.get("input_tokens", 0)
+            call["output_tokens"] = usage.get("output_tokens", 0)
+            call["cached_tokens"] = (usage.get("input_token_details") or {}).get("cache_read") or 0
+            if text:
+                call["think_tokens_est"] = round(call["output_tokens"] * think_chars / len(text))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        call = self.calls.get(run_id)
+        if call is None:
+            return
+        with self.lock:
+            call["latency_seconds"] = time.perf_counter() - call["start"]
+            if call["first_token"] is not None:
+                call["ttft_seconds"] = call["first_token"] - call["start"]
+            if isinstance(error, GeneratorExit):
+                # A stream closed on purpose once the answer was complete; usage never arrives,
+                # so completion tokens are counted from the streamed chunks
+                call["stopped_early"] = True
+                call["output_tokens"] = call["streamed_tokens"]
+            else:
+                call["error"] = str(error)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the request, per analyst.node component, and every call in start order."""
+        with self.lock:
+            calls = sorted(self.calls.values(), key=lambda call: call["start"])
+            records = [
+                {key: val for key, val in call.items() if key not in ("start", "first_token", "streamed_tokens")}
+                for call in calls
+            ]
+
+        by_component = defaultdict(lambda: {"calls": 0, **{field: 0 for field in _TOKEN_FIELDS}, "latency_seconds": 0.0})
+        for record in records:
+            component = by_component[f"{record['analyst']}.{record['node']}"]
+            component["calls"] += 1
+            for field in _TOKEN_FIELDS:
+                component[field] += record[field]
+            component["latency_seconds"] += record["latency_seconds"] or 0.0
+
+        return {
+            "calls": len(records),
+            **{field: sum(record[field] for record in records) for field in _TOKEN_FIELDS},
+            "llm_seconds": sum(record["latency_seconds"] or 0.0 for record in records),
+            "by_component": dict(by_component),
+            "call_details": records
+        }
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None}
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95))}
+
+
+def summarize_usage(sample_usages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run-level cost summary over the per-sample LLMUsageTracker summaries.
+
+    Returns totals, per-sample means, latency and time-to-first-token percentiles per
+    component, and a cost estimate from LLM_PRICE_INPUT_PER_MTOK / LLM_PRICE_OUTPUT_PER_MTOK.
+    """
+    records = [record for usage in sample_usages for record in usage.get("call_details", [])]
+    totals = {field: sum(record[field] for record in records) for field in _TOKEN_FIELDS}
+    num_samples = max(len(sample_usages), 1)
+
+    components = defaultdict(list)
+    for record in records:
+        components[f"{record['analyst']}.{record['node']}"].append(record)
+
+    by_component = {}
+    for name, component_records in sorted(components.items()):
+        latencies = [r["latency_seconds"] for r in component_records if r["latency_seconds"] is not None]
+        ttfts = [r["ttft_seconds"] for r in component_records if r["ttft_seconds"] is not None]
+        by_component[name] = {
+            "calls": len(component_records),
+            "errors": sum(1 for r in component_records if r["error"]),
+            "stopped_early": sum(1 for r in component_records if r["stopped_early"]),
+            **{f"mean_{field}": sum(r[field] for r in component_records) / len(component_records)
+               for field in _TOKEN_FIELDS},
+            "latency_seconds": _percentiles(latencies),
+            "ttft_seconds": _percentiles(ttfts)
+        }
+
+    return {
+        "samples": len(sample_usages),
+        "calls": len(records),
+        **totals,
+        "mean_calls_per_sample": len(records) / num_samples,
+        "mean_tokens_per_sample": (totals["input_tokens"] + totals["output_tokens"]) / num_samples,
+        "llm_seconds": sum(r["latency_seconds"] or 0.0 for r in records),
+        "estimated_cost": (totals["input_tokens"] * LLM_PRICE_INPUT_PER_MTOK
+                           + totals["output_tokens"] * LLM_PRICE_OUTPUT_PER_MTOK) / 1e6,
+        "by_component": by_component
+    }
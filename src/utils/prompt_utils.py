@@ -0,0 +1,85 @@
+import re
+import textwrap
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class CompiledPrompt:
+    """
+    Prompt template split into a static system message and a dynamic user message.
+
+    Everything before the paragraph holding the first placeholder is identical across
+    requests, so it is sent as the system message and the server's prefix cache can reuse
+    it; the rest is pre-split into literal and placeholder parts and filled per request.
+    """
+    def __init__(self, template: str):
+        text = textwrap.dedent(template).strip()
+        first = PLACEHOLDER_PATTERN.search(text)
+        split = text.rfind("\n\n", 0, first.start()) if first else -1
+        if split == -1:
+            self.static, dynamic = "", text
+        else:
+            self.static, dynamic = text[:split].strip(), text[split:].strip()
+
+        # Alternating literal text and placeholder names, parsed once
+        pieces = PLACEHOLDER_PATTERN.split(dynamic)
+        self.parts: List[Tuple[str, bool]] = [(piece, i % 2 == 1) for i, piece in enumerate(pieces) if piece]
+        self.placeholders = [piece for piece, is_field in self.parts if is_field]
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """Fills the dynamic part; raises KeyError for a placeholder without a value."""
+        return "".join(str(values[piece]) if is_field else piece for piece, is_field in self.parts)
+
+    def messages(self, values: Dict[str, Any]) -> List[BaseMessage]:
+        """Returns [SystemMessage(static prefix), HumanMessage(dynamic part)]."""
+        if not self.static:
+            return [HumanMessage(content=self.render(values))]
+        return [SystemMessage(content=self.static), HumanMessage(content=self.render(values))]
+
+
+@lru_cache(maxsize=64)
+def compile_prompt(template: str) -> CompiledPrompt:
+    """Compiles a prompt template once; later calls with the same template reuse the result."""
+    return CompiledPrompt(template)
+
+
+class PrefixCacheStats:
+    """
+    Prompt tokens served from the server's prefix cache, as reported in each response's usage
+    (vLLM reports it when started with --enable-prompt-tokens-details).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.reported_calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, response: Any):
+        usage: Optional[Dict[str, Any]] = getattr(response, "usage_metadata", None)
+        cached = (usage or {}).get("input_token_details", {}).get("cache_read")
+        with self.lock:
+            self.calls += 1
+            if cached is not None:
+                self.reported_calls += 1
+                self.prompt_tokens += usage.get("input_tokens", 0)
+                self.cached_tokens += cached
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "reported_calls": self.reported_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else None
+            }
+
+
+# Global prefix cache statistics
+prefix_cache_stats = PrefixCacheStats()
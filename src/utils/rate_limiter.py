@@ -1,31 +1,127 @@
 import time
+import asyncio
+import inspect
 import threading
 from functools import wraps
+from typing import Dict
+
+
+class TokenBucket:
+    """
+    Token bucket for a single service: refills at `rate` tokens per second up to `burst`.
+
+    Tokens are reserved under a short lock and the wait happens outside it, so concurrent
+    callers queue in arrival order without blocking each other (or other services) on the lock.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Wait-time statistics
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self) -> float:
+        """Takes one token and returns how long the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: each waiter owns the deficit it created
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+
+            self.calls += 1
+            if wait > 0:
+                self.waited_calls += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "total_wait_seconds": self.total_wait,
+                "avg_wait_seconds": self.total_wait / self.calls if self.calls else 0.0,
+                "max_wait_seconds": self.max_wait
+            }
 
 
 class RateLimiter:
     def __init__(self):
-        self.last_call = {}
+        self.buckets: Dict[str, TokenBucket] = {}
         self.lock = threading.Lock()
-    
-    def rate_limit(self, service: str, delay: float):
-        """Rate limiting decorator"""
+
+    def configure(self, service: str, rate: float, burst: int = 1) -> TokenBucket:
+        """Creates or replaces the bucket for a service."""
+        with self.lock:
+            self.buckets[service] = TokenBucket(rate, burst)
+            return self.buckets[service]
+
+    def _bucket(self, service: str) -> TokenBucket:
+        bucket = self.buckets.get(service)
+        if bucket is None:
+            raise KeyError(f"No rate limit configured for service: {service}")
+        return bucket
+
+    def acquire(self, service: str) -> float:
+        """Blocks the calling thread until a token for the service is available. Returns the wait."""
+        wait = self._bucket(service).reserve()
+        if wait > 0:
+            print(f"Rate limiting {service}: sleeping {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, service: str) -> float:
+        """Asyncio variant of acquire that yields to the event loop while waiting."""
+        wait = self._bucket(service).reserve()
+        if wait > 0:
+            print(f"Rate limiting {service}: sleeping {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def rate_limit(self, service: str, delay: float, burst: int = 1):
+        """
+        Rate limiting decorator: at most `burst` back-to-back calls, then one every `delay` seconds.
+
+        Works on both sync and async functions. An already configured bucket for the service
+        is shared rather than replaced.
+        """
+        with self.lock:
+            if service not in self.buckets:
+                self.buckets[service] = TokenBucket(1.0 / delay, burst)
+
         def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    await self.aacquire(service)
+                    return await func(*args, **kwargs)
+                return async_wrapper
+
             @wraps(func)
             def wrapper(*args, **kwargs):
-                with self.lock:
-                    current_time = time.time()
-                    if service in self.last_call:
-                        time_since_last = current_time - self.last_call[service]
-                        if time_since_last < delay:
-                            sleep_time = delay - time_since_last
-                            print(f"Rate limiting {service}: sleeping {sleep_time:.2f}s")
-                            time.sleep(sleep_time)
-                    
-                    self.last_call[service] = time.time()
-                    return func(*args, **kwargs)
+                self.acquire(service)
+                return func(*args, **kwargs)
             return wrapper
         return decorator
 
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-service call counts and wait-time statistics."""
+        return {service: bucket.stats() for service, bucket in list(self.buckets.items())}
+
 # Global rate limiter instance
 rate_limiter = RateLimiter()
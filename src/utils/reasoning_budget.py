@@ -0,0 +1,113 @@
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.messages.ai import add_usage
+from langchain_core.runnables import RunnableConfig
+
+REASONING_OFF = "off"
+REASONING_UNLIMITED = "unlimited"
+REASONING_NODES = ("agent", "final_reasoning", "consensus_judge")
+
+# Qwen3 thinking budget per LLM node: "off", "unlimited" or a maximum number of thinking tokens
+REASONING_BUDGETS = {
+    node: os.getenv(f"REASONING_BUDGET_{node.upper()}", REASONING_UNLIMITED) for node in REASONING_NODES
+}
+
+THINK_END = "</think>"
+
+
+def parse_budget(value: str) -> Optional[int]:
+    """Returns None for unlimited, 0 for thinking disabled, or the token cap."""
+    value = str(value).strip().lower()
+    if value == REASONING_UNLIMITED:
+        return None
+    if value == REASONING_OFF:
+        return 0
+    budget = int(value)
+    if budget <= 0:
+        raise ValueError(f"Reasoning budget must be '{REASONING_OFF}', '{REASONING_UNLIMITED}' or a positive integer, got {value}")
+    return budget
+
+
+def get_budget(node: str) -> Optional[int]:
+    return parse_budget(REASONING_BUDGETS.get(node, REASONING_UNLIMITED))
+
+
+def _call(llm, messages: List[BaseMessage], config: Optional[RunnableConfig],
+          stop_when: Optional[Callable[[str], bool]], **kwargs) -> AIMessage:
+    """Invokes llm, or streams it and closes the stream as soon as stop_when(text so far) holds."""
+    # Streaming bypasses the LLM response cache and the pool's hedging, so cached and hedged
+    # models are invoked as a whole and their output is checked once it is complete
+    if stop_when is None or getattr(llm, "cache", None) is not None or getattr(llm, "hedge", False):
+        response = llm.invoke(messages, config, **kwargs)
+        if stop_when is not None and isinstance(response.content, str):
+            stop_when(response.content)
+        return response
+
+    message = None
+    stream = llm.stream(messages, config, **kwargs)
+    try:
+        for chunk in stream:
+            message = chunk if message is None else message + chunk
+            if isinstance(message.content, str) and stop_when(message.content):
+                return AIMessage(
+                    content=message.content,
+                    usage_metadata=message.usage_metadata,
+                    response_metadata={**message.response_metadata, "finish_reason": "early_stop"}
+                )
+    finally:
+        # Closing the stream drops the connection, which makes the server abort the request
+        stream.close()
+    if message is None:
+        return AIMessage(content="")
+    return AIMessage(
+        content=message.content,
+        tool_calls=message.tool_calls,
+        usage_metadata=message.usage_metadata,
+        response_metadata=message.response_metadata
+    )
+
+
+def invoke_with_budget(llm, messages: List[BaseMessage], node: str,
+                       config: Optional[RunnableConfig] = None,
+                       stop_when: Optional[Callable[[str], bool]] = None) -> AIMessage:
+    """
+    Invokes llm with the thinking budget configured for node.
+
+    With thinking off, the chat template is rendered with enable_thinking=False. With a cap,
+    the first call stops after that many tokens; if it was cut off, an unfinished <think>
+    block is closed and the same assistant message is continued, so the answer itself is
+    never truncated by the cap. Requires the server to return the think block in the content
+    (no --reasoning-parser).
+
+    With stop_when, the generation is streamed and ended early once stop_when(content) holds.
+    """
+    budget = get_budget(node)
+    if budget is None:
+        return _call(llm, messages, config, stop_when)
+    if budget == 0:
+        return _call(llm, messages, config, stop_when,
+                     extra_body={"chat_template_kwargs": {"enable_thinking": False}})
+
+    response = _call(llm, messages, config, stop_when, max_tokens=budget)
+    if response.response_metadata.get("finish_reason") != "length":
+        return response
+
+    partial = response.content
+    if THINK_END not in partial:
+        partial = partial.rstrip() + f"\n{THINK_END}\n\n"
+    continuation = _call(
+        llm, messages + [AIMessage(content=partial)], config,
+        (lambda text: stop_when(partial + text)) if stop_when else None,
+        extra_body={"continue_final_message": True, "add_generation_prompt": False}
+    )
+    usage: Dict[str, Any] = response.usage_metadata
+    if usage and continuation.usage_metadata:
+        usage = add_usage(usage, continuation.usage_metadata)
+    return AIMessage(
+        content=partial + continuation.content,
+        tool_calls=continuation.tool_calls,
+        usage_metadata=usage or continuation.usage_metadata,
+        response_metadata={**continuation.response_metadata, "reasoning_budget_hit": True}
+    )
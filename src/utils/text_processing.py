@@ -1,5 +1,5 @@
 import re
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
 
 # Khớp một dòng: Answer: … | Evidence: …
@@ -39,6 +39,69 @@ def extract_answer_from_result(result: str) -> Tuple[str, str]:
 
 
 
+# Evidence kết thúc ở dòng trống hoặc ở dòng mở đầu một mục mới (Context:, ### ...)
+EVIDENCE_END_PATTERN = re.compile(
+    r"\n\s*\n|\n(?=\s*(?:[-*]\s*)?(?:\*\*)?(?:Answer|Evidence|Context|Question|Candidates|KBs_Knowledge"
+    r"|Object_Analysis|Explanation)\s*:|\s*###)",
+    re.IGNORECASE,
+)
+ANSWER_LINE_PATTERN = re.compile(r"Answer:\s*([^|\n]+?)\s*(?:\||\n)", re.IGNORECASE)
+EVIDENCE_START_PATTERN = re.compile(r"Evidence\s*:", re.IGNORECASE)
+
+
+class StreamingAnswerParser:
+    """
+    Incremental parser for a streamed "Answer: … Evidence: …" generation.
+
+    feed() receives the text generated so far and returns True once both fields are
+    complete, i.e. the Evidence paragraph has been closed by a blank line or a new field.
+    Text inside the <think> block is ignored. on_answer is called once, as soon as the
+    Answer line is complete.
+    """
+    def __init__(self, on_answer: Optional[Callable[[str], None]] = None):
+        self.on_answer = on_answer
+        self.answer: Optional[str] = None
+        self.end: Optional[int] = None
+        self._answer_start = 0
+        self._checked = -1
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str) -> bool:
+        if self.complete:
+            return True
+        # Fields end at a line break, "|" (inline format) or the ":"/"#" of the next field,
+        # so only re-parse when one of those arrives
+        boundary = max(text.rfind("\n"), text.rfind("|"), text.rfind(":"), text.rfind("#"))
+        if boundary <= self._checked:
+            return False
+        self._checked = boundary
+
+        think_end = text.rfind("</think>")
+        if think_end == -1 and text.lstrip().startswith("<think>"):
+            return False
+        start = think_end + len("</think>") if think_end != -1 else 0
+
+        if self.answer is None:
+            match = ANSWER_LINE_PATTERN.search(text, start)
+            if not match:
+                return False
+            self.answer, self._answer_start = match.group(1).strip(), match.start()
+            if self.on_answer is not None:
+                self.on_answer(self.answer)
+
+        evidence = EVIDENCE_START_PATTERN.search(text, self._answer_start)
+        if not evidence:
+            return False
+        for end in EVIDENCE_END_PATTERN.finditer(text, evidence.end()):
+            if text[evidence.end():end.start()].strip():
+                self.end = end.start()
+                return True
+        return False
+
+
 def extract_explanation(result: str) -> str:
     """
     Extract the explanation from the agent's result text,
@@ -0,0 +1,101 @@
+import re
+import json
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple, Union
+
+from PIL import Image
+
+from src.utils.image_processing import pil_to_base64
+
+# Tool argument carrying the image payload; replaced by the image hash in memo keys
+IMAGE_ARG = "image"
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, dict):
+        return {key: _canonical(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(val) for val in value]
+    return value
+
+
+class ToolMemo:
+    """
+    Request-scoped memo of tool results, shared by all analysts of one graph invocation.
+
+    Calls are keyed by (tool name, canonicalized args without the image payload, image hash).
+    A call identical to one already finished returns its result; a call identical to one
+    still running waits for it instead of executing again. Failed calls are not memoized.
+
+    Passed to nodes as config["configurable"]["tool_memo"].
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Future] = {}
+        self.images: Dict[int, Tuple[Any, str, str]] = {}
+        self.calls = Counter()
+        self.deduplicated = Counter()
+
+    def image_payload(self, image: Union[str, Image.Image]) -> Tuple[str, str]:
+        """Returns (base64 payload, content hash) for the image, encoding it only once per request."""
+        with self.lock:
+            cached = self.images.get(id(image))
+            if cached is not None and cached[0] is image:
+                return cached[1], cached[2]
+        payload = image if isinstance(image, str) else pil_to_base64(image)
+        image_hash = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        with self.lock:
+            # Holding a reference keeps id(image) from being reused during the request
+            self.images[id(image)] = (image, payload, image_hash)
+        return payload, image_hash
+
+    @staticmethod
+    def make_key(tool_name: str, args: Dict[str, Any], image_hash: str = None) -> str:
+        canonical = _canonical({key: val for key, val in args.items() if key != IMAGE_ARG})
+        return json.dumps([tool_name, canonical, image_hash], sort_keys=True, ensure_ascii=False)
+
+    def invoke(self, tool_name: str, args: Dict[str, Any], fn: Callable[[], Any], image_hash: str = None) -> Any:
+        """
+        Returns the memoized result for the call, running fn only for the first of identical calls.
+
+        Args:
+            tool_name (str): Name of the tool.
+            args (Dict[str, Any]): Tool arguments, as sent by the agent.
+            fn (Callable[[], Any]): Executes the call.
+            image_hash (str): Hash of the image the call refers to, if any.
+        """
+        key = self.make_key(tool_name, args, image_hash)
+        with self.lock:
+            self.calls[tool_name] += 1
+            future = self.entries.get(key)
+            owner = future is None
+            if owner:
+                future = self.entries[key] = Future()
+            else:
+                self.deduplicated[tool_name] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self.lock:
+                del self.entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "calls": sum(self.calls.values()),
+                "deduplicated": sum(self.deduplicated.values()),
+                "deduplicated_by_tool": dict(self.deduplicated)
+            }